@@ -0,0 +1,242 @@
+""" Benchmark of the API controllers over a synthetic multi-year dataset. The dataset is loaded into `DB_URL` through
+the ingest loader, then every controller is measured through the Flask test client or a local gunicorn server.
+Results are written as JSON and can be compared with the baseline to catch regressions before deploy.
+
+Usage: PYTHONPATH=src DB_URL=postgres://postgres@postgres:5432/bench python benchmarks/api.py \
+    --countries 250 --years 3 --mode client gunicorn --output results.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import typing as t
+from datetime import date, datetime, timedelta
+from http.client import HTTPConnection
+from threading import Thread
+from time import monotonic
+
+from load import start_server
+
+from root.db import db, transaction
+from scrapping.aggregates import refresh_aggregates
+from scrapping.bulk import upsert_rows
+from scrapping.cache import RESPONSE_CACHE, bump_data_version
+from scrapping.parser import Covid19Row
+from app import app
+
+
+START_DATE = date(2020, 1, 3)
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+Request = t.Tuple[str, str, t.Optional[bytes]]
+
+
+def country_codes(count: int) -> t.List[str]:
+    """ Function generates ISO Alpha-2 like codes of the countries. """
+    return [f'{chr(65 + index // 26 % 26)}{chr(65 + index % 26)}' for index in range(count)]
+
+
+def generate_rows(countries: t.List[str], days: int) -> t.Iterator[Covid19Row]:
+    """ Function generates daily data of every country.
+
+    :param countries: Codes of the countries.
+    :param days: Number of days.
+    :return: Iterator over rows.
+    """
+    rng = random.Random(0)
+    for offset in range(days):
+        record_date = START_DATE + timedelta(days=offset)
+        for country in countries:
+            yield Covid19Row(record_date, country, f'Country {country}', rng.randint(0, 100), rng.randint(0, 10000))
+
+
+def load_dataset(countries: t.List[str], days: int) -> int:
+    """ Function replaces data in the database by the synthetic dataset.
+
+    :return: Number of loaded rows.
+    """
+    db.drop_all()
+    db.create_all()
+    with transaction() as session:
+        report = upsert_rows(session, generate_rows(countries, days), [])
+        refresh_aggregates(session)
+        bump_data_version(session)
+    return report.inserted
+
+
+def request_factories(countries: t.List[str], days: int) -> t.Dict[str, t.Callable[[random.Random], Request]]:
+    """ Function returns generators of random requests of every controller. """
+    def day(rng: random.Random) -> str:
+        return (START_DATE + timedelta(days=rng.randrange(days))).isoformat()
+
+    def series(rng: random.Random) -> Request:
+        start = START_DATE + timedelta(days=rng.randrange(max(days - 30, 1)))
+        return 'GET', f'/{rng.choice(countries)}/series?from={start}&to={start + timedelta(days=30)}', None
+
+    def batch(rng: random.Random) -> Request:
+        body = {'countries': rng.sample(countries, min(50, len(countries))), 'date': day(rng)}
+        return 'POST', '/batch', json.dumps(body).encode()
+
+    return {
+        'country_by_date': lambda rng: ('GET', f'/{rng.choice(countries)}/{day(rng)}', None),
+        'total_to_date_by_country': lambda rng: ('GET', f'/{rng.choice(countries)}?date={day(rng)}', None),
+        'world_total_to_date': lambda rng: ('GET', f'/world?date={day(rng)}', None),
+        'world_total_by_date': lambda rng: ('GET', f'/world/{day(rng)}', None),
+        'country_series': series,
+        'batch_by_date': batch,
+    }
+
+
+def summarize(latencies: t.List[float], errors: int, duration: float) -> t.Dict[str, float]:
+    """ Function calculates throughput and latency percentiles in milliseconds. """
+    ordered = sorted(latencies)
+    summary = {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput': len(ordered) / duration if duration else 0.0,
+        'max': ordered[-1] * 1000 if ordered else 0.0,
+    }
+    for share in PERCENTILES:
+        index = min(len(ordered) - 1, int(len(ordered) * share))
+        summary[f'p{int(share * 100)}'] = ordered[index] * 1000 if ordered else 0.0
+    return summary
+
+
+def measure_client(factory: t.Callable[[random.Random], Request], requests: int) -> t.Dict[str, float]:
+    """ Function measures controller sequentially through the Flask test client. """
+    client = app.test_client()
+    rng = random.Random(1)
+    latencies = []
+    errors = 0
+    started = monotonic()
+    for _ in range(requests):
+        method, path, body = factory(rng)
+        request_started = monotonic()
+        response = client.open(path, method=method, data=body, content_type='application/json')
+        response.get_data()
+        latencies.append(monotonic() - request_started)
+        errors += response.status_code >= 500
+    return summarize(latencies, errors, monotonic() - started)
+
+
+def measure_server(
+        factory: t.Callable[[random.Random], Request], port: int, concurrency: int, duration: float
+) -> t.Dict[str, float]:
+    """ Function measures controller with concurrent keep-alive clients of the local gunicorn server. """
+    latencies: t.List[float] = []
+    errors: t.List[int] = []
+    deadline = monotonic() + duration
+
+    def run(seed: int) -> None:
+        rng = random.Random(seed)
+        connection = HTTPConnection('127.0.0.1', port, timeout=30)
+        while monotonic() < deadline:
+            method, path, body = factory(rng)
+            request_started = monotonic()
+            try:
+                connection.request(method, path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+            except OSError:
+                errors.append(1)
+                connection.close()
+                connection = HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies.append(monotonic() - request_started)
+            if response.status >= 500:
+                errors.append(1)
+        connection.close()
+
+    started = monotonic()
+    clients = [Thread(target=run, args=(seed,)) for seed in range(concurrency)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return summarize(latencies, len(errors), monotonic() - started)
+
+
+def compare(results: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any], tolerance: float) -> t.List[str]:
+    """ Function finds controllers which p95 latency regressed compared with the baseline.
+
+    :return: Descriptions of the regressions.
+    """
+    regressions = []
+    for mode, controllers in results['results'].items():
+        for name, summary in controllers.items():
+            previous = baseline.get('results', {}).get(mode, {}).get(name)
+            if previous and summary['p95'] > previous['p95'] * (1 + tolerance):
+                regressions.append(f'{mode}/{name}: p95 {previous["p95"]:.2f} ms -> {summary["p95"]:.2f} ms')
+    return regressions
+
+
+def main() -> None:
+    """ Entry point of the benchmark. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--countries', type=int, default=250)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--skip-load', action='store_true', help='Use the dataset loaded by the previous run.')
+    parser.add_argument('--mode', nargs='+', choices=['client', 'gunicorn'], default=['client'])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per controller in client mode.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clients of gunicorn mode.')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per controller in gunicorn mode.')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--no-cache', action='store_true', help='Disable response cache.')
+    parser.add_argument('--output', help='Path of JSON results.')
+    parser.add_argument('--baseline', help='Path of JSON results to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed share of p95 growth.')
+    args = parser.parse_args()
+
+    countries = country_codes(args.countries)
+    days = int(args.years * 365)
+    results: t.Dict[str, t.Any] = {
+        'meta': {
+            'countries': args.countries, 'days': days, 'cache': not args.no_cache,
+            'database': db.engine.dialect.name, 'created_at': datetime.utcnow().isoformat(),
+        },
+        'results': {},
+    }
+    if not args.skip_load:
+        results['meta']['rows'] = load_dataset(countries, days)
+    factories = request_factories(countries, days)
+
+    if 'client' in args.mode:
+        if args.no_cache:
+            RESPONSE_CACHE.max_size = 0
+        results['results']['client'] = {
+            name: measure_client(factory, args.requests) for name, factory in factories.items()
+        }
+    if 'gunicorn' in args.mode:
+        server = start_server('threads', args.port, {'CACHE_SIZE': '0'} if args.no_cache else {})
+        try:
+            results['results']['gunicorn'] = {
+                name: measure_server(factory, args.port, args.concurrency, args.duration)
+                for name, factory in factories.items()
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'{"mode":9} {"controller":26} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for mode, controllers in results['results'].items():
+        for name, summary in controllers.items():
+            print(
+                f'{mode:9} {name:26} {summary["throughput"]:9.1f} {summary["p50"]:8.2f} '
+                f'{summary["p95"]:8.2f} {summary["p99"]:8.2f} {summary["errors"]:7}'
+            )
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
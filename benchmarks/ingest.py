@@ -0,0 +1,108 @@
+""" Benchmark of the ingest pipeline. Synthetic WHO-format files of increasing size are replayed through the pipeline
+without downloader: full load into empty tables, then incremental load of the file with changed last week. Wall
+time, rows/sec and peak memory of every stage show which stage dominates as the file grows.
+
+Usage: PYTHONPATH=src DB_URL=postgres://postgres@postgres:5432/bench python benchmarks/ingest.py \
+    --sizes 10000 50000 200000 --trace-memory --output ingest.json
+"""
+
+import argparse
+import csv
+import json
+import random
+import typing as t
+from datetime import date, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from root.db import db
+from scrapping.pipeline import IngestReport, Pipeline
+from scrapping.tasks import ingest_csv
+
+
+HEADERS = [
+    'Date_reported', 'Country_code', 'Country', 'WHO_region',
+    'New_cases', 'Cumulative_cases', 'New_deaths', 'Cumulative_deaths'
+]
+COUNTRIES = 235
+CHANGED_DAYS = 7
+
+
+def write_csv(path: Path, rows: int, seed: int, changed_days: int = 0) -> None:
+    """ Function writes synthetic data file in WHO format.
+
+    :param path: Path of the file.
+    :param rows: Approximate number of rows, rounded up to full days of all countries.
+    :param seed: Seed of the values.
+    :param changed_days: Number of the last days which values differ from the file with the same seed.
+    """
+    days = -(-rows // COUNTRIES)
+    start = date(2020, 1, 3)
+    rng = random.Random(seed)
+    totals = [[0, 0] for _ in range(COUNTRIES)]
+    with open(path, 'w', newline='') as data_file:
+        writer = csv.writer(data_file)
+        writer.writerow(HEADERS)
+        for day in range(days):
+            record_date = f'{start + timedelta(days=day)}T00:00:00Z'
+            shift = 1 if day >= days - changed_days else 0
+            for index, total in enumerate(totals):
+                country = f'{chr(65 + index // 26)}{chr(65 + index % 26)}'
+                cases, death = rng.randint(0, 10000) + shift, rng.randint(0, 100)
+                total[0] += cases
+                total[1] += death
+                writer.writerow([record_date, country, f'Country {country}', 'EURO', cases, total[0], death, total[1]])
+
+
+def print_report(size: int, kind: str, report: IngestReport) -> None:
+    """ Function prints measurements of the stages. """
+    for stage in report.stages:
+        memory = '-' if stage.peak_memory is None else f'{stage.peak_memory / 2 ** 20:.1f}'
+        print(
+            f'{size:>9} {kind:12} {stage.name:12} {stage.seconds:9.3f} {stage.rows_per_second:12,.0f} {memory:>9}'
+        )
+    print(f'{size:>9} {kind:12} {"total":12} {report.seconds:9.3f}')
+
+
+def to_json(report: IngestReport) -> t.Dict[str, t.Any]:
+    """ Function converts report into JSON friendly dictionary. """
+    return {
+        'status': report.status,
+        'changed_days': report.changed_days,
+        'seconds': report.seconds,
+        'stages': [{**stage._asdict(), 'rows_per_second': stage.rows_per_second} for stage in report.stages],
+    }
+
+
+def main() -> None:
+    """ Entry point of the benchmark. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--trace-memory', action='store_true', help='Trace peak memory, it slows down the stages.')
+    parser.add_argument('--output', help='Path of JSON results.')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"rows":>9} {"run":12} {"stage":12} {"seconds":>9} {"rows/sec":>12} {"peak MiB":>9}')
+    with TemporaryDirectory() as directory:
+        for size in args.sizes:
+            db.drop_all()
+            db.create_all()
+            path = Path(directory) / f'data-{size}.csv'
+
+            write_csv(path, size, seed=size)
+            full = ingest_csv(path, Pipeline(args.trace_memory))
+            print_report(size, 'full', full)
+
+            write_csv(path, size, seed=size, changed_days=CHANGED_DAYS)
+            incremental = ingest_csv(path, Pipeline(args.trace_memory))
+            print_report(size, 'incremental', incremental)
+            results.append({'rows': size, 'full': to_json(full), 'incremental': to_json(incremental)})
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+""" Load test of the serving modes of gunicorn. Every mode is started as a separate gunicorn server with the project
+configuration and loaded by concurrent keep-alive clients for the fixed duration.
+
+Usage: PYTHONPATH=src python benchmarks/load.py --modes threads gevent --concurrency 64 --duration 10 \
+    --path /UA/2020-05-27 --path /world --env CACHE_SIZE=0
+"""
+
+import argparse
+import os
+import subprocess  # nosec
+import sys
+import typing as t
+from http.client import HTTPConnection
+from itertools import cycle
+from threading import Thread
+from time import monotonic, sleep
+
+
+class Result(t.NamedTuple):
+    """ Result of the load of one serving mode. """
+    mode: str
+    requests: int
+    errors: int
+    duration: float
+    latencies: t.List[float]
+
+    @property
+    def throughput(self) -> float:
+        """ Requests per second. """
+        return self.requests / self.duration
+
+    def percentile(self, share: float) -> float:
+        """ Latency percentile in milliseconds. """
+        if not self.latencies:
+            return float('nan')
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * share))] * 1000
+
+
+def start_server(mode: str, port: int, env: t.Dict[str, str]) -> subprocess.Popen:
+    """ Function starts gunicorn in the requested mode and waits until it accepts requests.
+
+    :param mode: Value of `SERVER_MODE`.
+    :param port: Local port of the server.
+    :param env: Additional environment variables of the server.
+    :return: Server process.
+    """
+    server = subprocess.Popen(  # nosec
+        [
+            sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+            '--config', 'python:root.gunicorn', '--bind', f'127.0.0.1:{port}', 'app:app'
+        ],
+        env={**os.environ, **env, 'SERVER_MODE': mode, 'DEBUG': 'false'}
+    )
+    deadline = monotonic() + 30
+    while monotonic() < deadline:
+        try:
+            connection = HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return server
+        except OSError:
+            sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'Server in {mode} mode was not started.')
+
+
+def run_client(port: int, paths: t.List[str], deadline: float, latencies: t.List[float], errors: t.List[int]) -> None:
+    """ Function sends requests through keep-alive connection until deadline. """
+    connection = HTTPConnection('127.0.0.1', port, timeout=30)
+    for path in cycle(paths):
+        if monotonic() >= deadline:
+            break
+        started = monotonic()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+        except OSError:
+            errors.append(1)
+            connection.close()
+            connection = HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(monotonic() - started)
+        if response.status >= 500:
+            errors.append(1)
+    connection.close()
+
+
+def load(mode: str, port: int, args: argparse.Namespace, env: t.Dict[str, str]) -> Result:
+    """ Function loads server of the serving mode.
+
+    :return: Measured results.
+    """
+    server = start_server(mode, port, env)
+    try:
+        latencies: t.List[float] = []
+        errors: t.List[int] = []
+        started = monotonic()
+        clients = [
+            Thread(target=run_client, args=(port, args.path, started + args.duration, latencies, errors))
+            for _ in range(args.concurrency)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        return Result(mode, len(latencies), len(errors), monotonic() - started, latencies)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    """ Entry point of the benchmark. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['threads', 'gevent'])
+    parser.add_argument('--path', action='append', help='Requested path, can be repeated. Default: /world')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--env', action='append', default=[], help='Environment of the server as KEY=VALUE.')
+    args = parser.parse_args()
+    args.path = args.path or ['/world']
+    env = dict(item.split('=', 1) for item in args.env)
+
+    print(f'{"mode":8} {"req/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for mode in args.modes:
+        result = load(mode, args.port, args, env)
+        print(
+            f'{result.mode:8} {result.throughput:10.1f} {result.percentile(0.5):8.1f} '
+            f'{result.percentile(0.95):8.1f} {result.percentile(0.99):8.1f} {result.errors:7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
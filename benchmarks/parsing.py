@@ -0,0 +1,88 @@
+""" Benchmark of validation of WHO data file rows: marshmallow schema against the fast parser.
+
+Usage: PYTHONPATH=src python benchmarks/parsing.py --rows 100000
+"""
+
+import argparse
+import random
+import typing as t
+from datetime import date, timedelta
+from time import perf_counter
+
+from marshmallow import ValidationError
+
+from scrapping.parser import parse_chunks
+from scrapping.schemas import COVID19_LOAD_SCHEMA
+
+
+def generate_rows(count: int) -> t.List[t.List[str]]:
+    """ Function generates synthetic rows in format of WHO data file.
+
+    :param count: Number of rows.
+    :return: Rows of the data file without headers.
+    """
+    start = date(2020, 1, 3)
+    rows = []
+    for index in range(count):
+        country = f'{chr(65 + index % 26)}{chr(65 + index // 26 % 26)}'
+        record_date = start + timedelta(days=index // 676)
+        cases, death = random.randint(0, 10000), random.randint(0, 100)
+        rows.append([
+            f'{record_date.isoformat()}T00:00:00Z', country, f'Country {country}', 'EURO',
+            str(cases), str(cases), str(death), str(death)
+        ])
+    return rows
+
+
+def schema_path(rows: t.List[t.List[str]]) -> int:
+    """ Validation through `COVID19_LOAD_SCHEMA` as it was done row by row. """
+    valid = 0
+    for row in rows:
+        try:
+            COVID19_LOAD_SCHEMA.load({
+                'record_date': row[0],
+                'countries_iso_alpha_2': row[1],
+                'country_name': row[2],
+                'new_cases': row[4],
+                'new_death': row[6],
+            })
+        except ValidationError:
+            continue
+        valid += 1
+    return valid
+
+
+def parser_path(rows: t.List[t.List[str]]) -> int:
+    """ Validation through the fast chunked parser. """
+    return sum(len(chunk.rows) for chunk in parse_chunks(rows))
+
+
+def measure(func: t.Callable[[t.List[t.List[str]]], int], rows: t.List[t.List[str]], repeat: int) -> float:
+    """ Function measures the best throughput of validation.
+
+    :return: Number of rows per second.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = perf_counter()
+        func(rows)
+        best = min(best, perf_counter() - started)
+    return len(rows) / best
+
+
+def main() -> None:
+    """ Entry point of the benchmark. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    schema_speed = measure(schema_path, rows, args.repeat)
+    parser_speed = measure(parser_path, rows, args.repeat)
+    print(f'schema: {schema_speed:12,.0f} rows/sec')
+    print(f'parser: {parser_speed:12,.0f} rows/sec ({parser_speed / schema_speed:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
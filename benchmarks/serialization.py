@@ -0,0 +1,67 @@
+""" Benchmark of per-response serialization cost of `Covid19Schema`: validated marshmallow dump against fast mode.
+
+Usage: PYTHONPATH=src python benchmarks/serialization.py --responses 20000
+"""
+
+import argparse
+import typing as t
+from datetime import date, timedelta
+from time import perf_counter
+
+from root.settings import API_DUMP_CHECK_RATE
+from scrapping.models import Covid19
+from scrapping.schemas import Covid19Schema
+
+
+def generate_records(count: int) -> t.List[t.Any]:
+    """ Function generates ORM records and result dictionaries in the proportion they are returned by controllers.
+
+    :param count: Number of records.
+    :return: Records to serialize.
+    """
+    start = date(2020, 1, 3)
+    records: t.List[t.Any] = []
+    for index in range(count):
+        record_date = start + timedelta(days=index % 365)
+        if index % 2:
+            records.append({
+                'record_date': record_date, 'country_name': 'World', 'new_death': index, 'new_cases': index * 10
+            })
+        else:
+            records.append(Covid19(
+                record_date=record_date, country_name='Ukraine', new_death=index, new_cases=index * 10
+            ))
+    return records
+
+
+def measure(schema: Covid19Schema, records: t.List[t.Any], repeat: int) -> float:
+    """ Function measures the best serialization cost.
+
+    :return: Microseconds per response.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = perf_counter()
+        for record in records:
+            schema.dump(record)
+        best = min(best, perf_counter() - started)
+    return best / len(records) * 1e6
+
+
+def main() -> None:
+    """ Entry point of the benchmark. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--responses', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check-rate', type=float, default=API_DUMP_CHECK_RATE)
+    args = parser.parse_args()
+
+    records = generate_records(args.responses)
+    validated = measure(Covid19Schema(fast=False), records, args.repeat)
+    fast = measure(Covid19Schema(fast=True, check_rate=args.check_rate), records, args.repeat)
+    print(f'validated: {validated:8.2f} us/response')
+    print(f'fast:      {fast:8.2f} us/response ({validated / fast:.1f}x, check rate {args.check_rate})')
+
+
+if __name__ == '__main__':
+    main()
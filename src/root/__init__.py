@@ -2,6 +2,8 @@
 
 from . import settings
 from . import app
+from . import metrics
 from . import db
+from . import cache
 from . import celery
 from . import utils
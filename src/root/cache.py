@@ -0,0 +1,127 @@
+""" Module contains in-process caches which are shared between threads of the worker. """
+
+import typing as t
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic
+
+from root.metrics import CACHE_EVICTIONS, CACHE_INVALIDATIONS, CACHE_REQUESTS
+
+
+CACHES: t.List['LRUCache'] = []
+
+
+class LRUCache:  # pylint: disable=too-many-instance-attributes
+    """ Thread-safe cache with limited size and time to live of the entries. Least recently used entries are evicted
+    when cache is full.
+    """
+
+    def __init__(self, max_size: int, ttl: float, name: str = 'default') -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: t.MutableMapping[t.Hashable, t.Tuple[float, t.Any]] = OrderedDict()
+        self._lock = RLock()
+        CACHES.append(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: t.Hashable) -> t.Any:
+        """ Method returns cached value.
+
+        :param key: Key of the entry.
+        :return: Cached value or None when it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                CACHE_REQUESTS.labels(self.name, 'miss').inc()
+                return None
+            self._entries.move_to_end(key)  # type: ignore
+            self.hits += 1
+            CACHE_REQUESTS.labels(self.name, 'hit').inc()
+            return entry[1]
+
+    def set(self, key: t.Hashable, value: t.Any) -> None:
+        """ Method stores value in the cache.
+
+        :param key: Key of the entry.
+        :param value: Cached value.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)  # type: ignore
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)  # type: ignore
+                self.evictions += 1
+                CACHE_EVICTIONS.labels(self.name).inc()
+
+    def clear(self) -> None:
+        """ Method removes all the entries. """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> t.Dict[str, int]:
+        """ Method returns counters of the cache usage. """
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class VersionedCache(LRUCache):
+    """ Cache which is invalidated when version of the cached data is changed. Version is checked not more often than
+    once per check interval.
+    """
+
+    def __init__(
+            self, max_size: int, ttl: float, get_version: t.Callable[[], t.Any], check_interval: float,
+            name: str = 'default'
+    ) -> None:
+        super().__init__(max_size, ttl, name)
+        self.get_version = get_version
+        self.check_interval = check_interval
+        self.invalidations = 0
+        self._version: t.Any = None
+        self._checked = float('-inf')
+
+    @property
+    def version(self) -> t.Any:
+        """ Current version of the cached data. Cache is cleared when version is changed. """
+        with self._lock:
+            if monotonic() - self._checked >= self.check_interval:
+                version = self.get_version()
+                if version != self._version:
+                    if self._entries:
+                        self.invalidations += 1
+                        CACHE_INVALIDATIONS.labels(self.name).inc()
+                    self._entries.clear()
+                    self._version = version
+                self._checked = monotonic()
+            return self._version
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._version = None
+            self._checked = float('-inf')
+
+    def stats(self) -> t.Dict[str, int]:
+        return {**super().stats(), 'invalidations': self.invalidations}
+
+
+def clear_caches() -> None:
+    """ Function clears all the caches of the process. """
+    for cache in CACHES:
+        cache.clear()
@@ -4,9 +4,9 @@ from celery import Celery
 from sentry_sdk.integrations.celery import CeleryIntegration
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 
-from root.settings import BROKER_URL, CELERY_WORKERS, SENTRY_URL
+from root.settings import BROKER_URL, CELERY_WORKERS, RESULT_BACKEND_URL, SENTRY_URL
 
-app = Celery('celery', broker=BROKER_URL)
+app = Celery('celery', broker=BROKER_URL, backend=RESULT_BACKEND_URL)
 
 app.conf.update({
     'task_default_delivery_mode': 'transient',
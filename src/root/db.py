@@ -1,17 +1,47 @@
 """ Module contains db objects. """
 
+import fcntl
+import hashlib
 import typing as t
 from contextlib import contextmanager
+from pathlib import Path
+from tempfile import gettempdir
+from time import monotonic, sleep
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, scoped_session
 
 from root.app import app
-from root.settings import DATABASE_URL, DEBUG
+from root.settings import (
+    LOCK_POLL_INTERVAL,
+    DATABASE_REPLICA_URL, DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE,
+    DB_STATEMENT_TIMEOUT, DEBUG
+)
+
+
+def engine_options(url: str) -> t.Dict[str, t.Any]:
+    """ Function returns options of the engines. Pool options are not applicable to SQLite.
+
+    :param url: URL of the database.
+    :return: Keyword arguments of `create_engine`.
+    """
+    if url.startswith('sqlite'):
+        return {}
+    options: t.Dict[str, t.Any] = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    if DB_STATEMENT_TIMEOUT and url.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'}
+    return options
 
 
 app.config.update({
     'SQLALCHEMY_DATABASE_URI': DATABASE_URL,
+    'SQLALCHEMY_ENGINE_OPTIONS': engine_options(DATABASE_URL),
     'SQLALCHEMY_ECHO': DEBUG,
     'SQLALCHEMY_TRACK_MODIFICATIONS': False,
 })
@@ -21,6 +51,23 @@ BaseModel = db.Model
 session = db.session
 
 
+def create_read_session() -> scoped_session:
+    """ Function creates session of read-only requests. It is bound to the replica when it's configured and removed
+    at the end of the request, otherwise requests are read from the primary database.
+
+    :return: Scoped session.
+    """
+    if not DATABASE_REPLICA_URL:
+        return session
+    replica_engine = create_engine(DATABASE_REPLICA_URL, echo=DEBUG, **engine_options(DATABASE_REPLICA_URL))
+    replica_session = db.create_scoped_session({'bind': replica_engine, 'binds': {}})
+    app.teardown_appcontext(lambda _exception: replica_session.remove())
+    return replica_session
+
+
+read_session = create_read_session()
+
+
 @contextmanager
 def connection() -> t.Iterator[Session]:
     """ Context manager for creation of separate db session. """
@@ -44,3 +91,65 @@ def transaction() -> t.Iterator[Session]:
     except Exception:
         session.rollback()
         raise
+
+
+def lock_key(name: str) -> int:
+    """ Function converts name of the lock into the key of PostgreSQL advisory lock.
+
+    :param name: Name of the lock.
+    :return: Signed 64-bit key.
+    """
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True)
+
+
+def poll(acquire: t.Callable[[], bool], timeout: float) -> bool:
+    """ Function retries acquiring of the lock until the timeout.
+
+    :param acquire: Non-blocking attempt to acquire the lock.
+    :param timeout: Seconds of waiting, zero means the single attempt.
+    :return: True when the lock is acquired.
+    """
+    deadline = monotonic() + timeout
+    while not acquire():
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return False
+        sleep(min(LOCK_POLL_INTERVAL, remaining))
+    return True
+
+
+@contextmanager
+def single_flight(name: str, timeout: float = 0) -> t.Iterator[bool]:
+    """ Context manager which allows only one holder of the named lock across all the processes. PostgreSQL advisory
+    lock is held by the dedicated connection, other databases fall back to the lock file which serializes processes
+    of the single host.
+
+    :param name: Name of the lock.
+    :param timeout: Seconds of waiting for the lock held by other process.
+    :return: True when the lock is acquired, False when the timeout is expired.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        key = lock_key(name)
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as lock_connection:
+            acquired = poll(lambda: lock_connection.scalar('SELECT pg_try_advisory_lock(%s)', key), timeout)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    lock_connection.scalar('SELECT pg_advisory_unlock(%s)', key)
+        return
+
+    with open(Path(gettempdir()) / f'{name}.lock', 'w') as lock_file:
+        def acquire() -> bool:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            return True
+
+        acquired = poll(acquire, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,8 +1,43 @@
+""" Configuration of gunicorn. Worker class and concurrency are selected by `SERVER_MODE`. """
+
+from pathlib import Path
 from socket import gethostname, gethostbyname
 
+from root.settings import METRICS_DIR, SERVER_MODE, WEB_CONNECTIONS, WEB_THREADS, WEB_WORKERS
+
 
 bind = f'{gethostbyname(gethostname())}:5000'
-workers = 2
-threads = 4
+workers = WEB_WORKERS
+
+if SERVER_MODE == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = WEB_CONNECTIONS
+elif SERVER_MODE == 'threads':
+    worker_class = 'gthread'
+    threads = WEB_THREADS
+else:
+    raise ValueError(f'Unsupported SERVER_MODE: {SERVER_MODE}')
 
 loglevel = 'warning'
+
+
+def post_fork(_server, _worker) -> None:
+    """ Hook which makes psycopg2 cooperative in greenlet workers, so waiting for database yields to other requests.
+    """
+    if SERVER_MODE == 'gevent':
+        from psycogreen.gevent import patch_psycopg  # pylint: disable=import-outside-toplevel
+        patch_psycopg()
+
+
+def on_starting(_server) -> None:
+    """ Hook which removes metrics of the previous run of the server. """
+    if METRICS_DIR is not None:
+        for path in Path(METRICS_DIR).glob('*.db'):
+            path.unlink()
+
+
+def child_exit(_server, worker) -> None:
+    """ Hook which marks metrics of the exited worker as dead, so its live gauges are not aggregated anymore. """
+    if METRICS_DIR is not None:
+        from prometheus_client import multiprocess  # pylint: disable=import-outside-toplevel
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,109 @@
+""" Module contains Prometheus metrics of the service and `/metrics` endpoint. When `prometheus_multiproc_dir` is set,
+metrics of all gunicorn workers and Celery processes are written to that directory and aggregated on scrape.
+"""
+
+import typing as t
+from contextlib import contextmanager
+from time import monotonic
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from root.app import app
+from root.settings import METRICS_DIR
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests.', ['endpoint', 'method']
+)
+REQUEST_COUNT = Counter(
+    'http_requests_total', 'Number of HTTP requests by status.', ['endpoint', 'method', 'status']
+)
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds', 'Duration of database statements.', ['operation'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Number of cache lookups by result.', ['cache', 'result']
+)
+CACHE_EVICTIONS = Counter(
+    'cache_evictions_total', 'Number of entries evicted from the cache.', ['cache']
+)
+CACHE_INVALIDATIONS = Counter(
+    'cache_invalidations_total', 'Number of invalidations of the cache by data change.', ['cache']
+)
+INGEST_STAGE_LATENCY = Histogram(
+    'ingest_stage_duration_seconds', 'Duration of the stages of data ingest.', ['stage'],
+    buckets=(.1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+
+INGEST_RUNS = Counter(
+    'ingest_runs_total', 'Number of scheduled ingest runs by result of the single-flight lock.', ['result']
+)
+INGEST_LOCK_WAIT = Histogram(
+    'ingest_lock_wait_seconds', 'Time spent waiting for the single-flight lock of the ingest.',
+    buckets=(.01, .1, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> t.Iterator[None]:
+    """ Context manager which measures duration of the ingest stage.
+
+    :param stage: Name of the stage.
+    """
+    started = monotonic()
+    try:
+        yield
+    finally:
+        INGEST_STAGE_LATENCY.labels(stage).observe(monotonic() - started)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    """ Listener which saves start time of the statement. """
+    conn.info.setdefault('query_started', []).append(monotonic())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def observe_query(conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+    """ Listener which measures duration of the statement. """
+    started = conn.info['query_started'].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+    DB_QUERY_LATENCY.labels(operation).observe(monotonic() - started)
+
+
+@app.before_request
+def start_request_timer() -> None:
+    """ Hook which saves start time of the request. """
+    g.request_started = monotonic()
+
+
+@app.after_request
+def observe_request(response: Response) -> Response:
+    """ Hook which measures latency and status of the request. Streamed responses are measured until the first
+    chunk of the body.
+    """
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(monotonic() - started)
+        REQUEST_COUNT.labels(endpoint, request.method, response.status_code).inc()
+    return response
+
+
+@app.route('/metrics')
+def metrics() -> Response:
+    """ Endpoint with metrics in Prometheus format.
+
+    :return: Metrics of all the processes when multiprocess mode is enabled, otherwise metrics of the worker.
+    """
+    registry = REGISTRY
+    if METRICS_DIR is not None:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,13 +1,32 @@
 """ Project utils. """
 
 import typing as t
+from collections.abc import Mapping
+from datetime import date
+from random import random
 from unittest.case import TestCase
 
 from flask.testing import FlaskClient
-from marshmallow import Schema
+from marshmallow import Schema, fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
 
 from root.app import app
-from root.db import db
+from root.cache import clear_caches
+from root.db import db, read_session
+from root.settings import API_DUMP_CHECK_RATE, API_FAST_DUMP
+
+
+MISSING = object()
+SERIALIZERS: t.Dict[t.Type[fields.Field], t.Callable[[t.Any], t.Any]] = {
+    fields.String: str,
+    fields.Integer: int,
+    fields.Float: float,
+    fields.Boolean: bool,
+    fields.Date: date.isoformat,
+}
+ISO_FORMATS = {None, 'iso', 'iso8601'}
+
+Converter = t.Tuple[str, str, t.Callable[[t.Any], t.Any]]
 
 
 class DBTestCase(TestCase):
@@ -17,15 +36,67 @@ class DBTestCase(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         cls.client = app.test_client()
+        read_session.remove()
         db.drop_all()
         db.create_all()
+        clear_caches()
+
+
+def compile_field(name: str, field: fields.Field) -> t.Optional[Converter]:
+    """ Function compiles field into plain conversion of the value which gives the same result as marshmallow.
+
+    :param name: Name of the field in the schema.
+    :param field: Field of the schema.
+    :return: Output key, attribute and converter of the value. None when field can't be compiled.
+    """
+    converter = next((
+        converter for field_class, converter in SERIALIZERS.items()
+        # pylint: disable=protected-access
+        if isinstance(field, field_class) and type(field)._serialize is field_class._serialize
+    ), None)
+    attribute = field.attribute or name
+    if converter is None or '.' in attribute or getattr(field, 'as_string', False):
+        return None
+    if getattr(field, 'format', None) not in ISO_FORMATS:
+        return None
+    return field.data_key or name, attribute, converter
 
 
 class APISchema(Schema):
-    """ Schema for dumping data. """
+    """ Schema for dumping data. Every response is validated by loading it back unless fast mode is on. In fast mode
+    schemas of plain fields are dumped by precompiled converters and only sampled responses are validated.
+    """
+    def __init__(self, *args, fast: bool = API_FAST_DUMP, check_rate: float = API_DUMP_CHECK_RATE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fast = fast
+        self.check_rate = check_rate
+        converters = [compile_field(name, field) for name, field in self.dump_fields.items()]
+        compiled = None not in converters and not self._has_processors(PRE_DUMP) and not self._has_processors(POST_DUMP)
+        self.converters: t.Optional[t.List[Converter]] = converters if compiled else None  # type: ignore
+
+    def serialize(self, obj: t.Any) -> t.Dict[str, t.Any]:
+        """ Method dumps single object by precompiled converters.
+
+        :param obj: Object or mapping.
+        :return: Serialized data.
+        """
+        get = obj.get if isinstance(obj, Mapping) else lambda key, default: getattr(obj, key, default)
+        result = {}
+        for key, attribute, converter in self.converters:  # type: ignore
+            value = get(attribute, MISSING)
+            if value is not MISSING:
+                result[key] = None if value is None else converter(value)
+        return result
+
     def dump(self, obj: t.Any, *, many: bool = None):
-        res = super().dump(obj, many=many)
+        fast = self.fast and self.converters is not None
+        if fast:
+            many = self.many if many is None else many
+            res: t.Any = [self.serialize(item) for item in obj] if many else self.serialize(obj)
+        else:
+            res = super().dump(obj, many=many)
         if not res:
             raise ValueError('Empty API response.')
-        self.load(res, many=many)
+        if not self.fast or random() < self.check_rate:  # nosec
+            self.load(res, many=many)
         return res
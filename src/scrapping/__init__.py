@@ -2,7 +2,16 @@
 
 from . import bp
 from . import models
+from . import aggregates
+from . import bulk
+from . import cache
+from . import snapshot
+from . import shards
 from . import schemas
+from . import parser
+from . import fingerprint
+from . import pipeline
 from . import scrapper
+from . import runs
 from . import tasks
 from . import controllers
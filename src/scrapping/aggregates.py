@@ -0,0 +1,101 @@
+""" Module contains maintenance of the precomputed aggregates of covid19 data. """
+
+import typing as t
+from datetime import date as dd
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from root.db import transaction
+from scrapping.models import Covid19, WorldDaily
+
+
+def refresh_country_totals(session: Session, since: t.Optional[dd] = None) -> None:
+    """ Function recalculates running totals of cases and death of every country starting from the requested date.
+
+    :param session: Session which contains updated data.
+    :param since: First date with outdated totals. The whole history is recalculated when it's omitted.
+    """
+    totals: t.Dict[str, t.Tuple[int, int]] = {}
+    records = session.query(Covid19)
+
+    if since is not None:
+        last_dates = session.query(
+            Covid19.countries_iso_alpha_2,
+            func.max(Covid19.record_date).label('record_date')
+        ).filter(
+            Covid19.record_date < since
+        ).group_by(
+            Covid19.countries_iso_alpha_2
+        ).subquery()
+        previous = session.query(
+            Covid19.countries_iso_alpha_2,
+            Covid19.total_cases,
+            Covid19.total_death
+        ).join(last_dates, and_(
+            Covid19.countries_iso_alpha_2 == last_dates.c.countries_iso_alpha_2,
+            Covid19.record_date == last_dates.c.record_date
+        ))
+        totals = {country: (cases or 0, death or 0) for country, cases, death in previous}
+        records = records.filter(Covid19.record_date >= since)
+
+    for record in records.order_by(Covid19.countries_iso_alpha_2, Covid19.record_date):
+        cases, death = totals.get(record.countries_iso_alpha_2, (0, 0))
+        record.total_cases = cases + (record.new_cases or 0)
+        record.total_death = death + (record.new_death or 0)
+        totals[record.countries_iso_alpha_2] = (record.total_cases, record.total_death)
+
+
+def refresh_world_daily(session: Session, since: t.Optional[dd] = None) -> None:
+    """ Function rebuilds daily rollup of the whole World starting from the requested date.
+
+    :param session: Session which contains updated data.
+    :param since: First date with outdated rollup. The whole history is rebuilt when it's omitted.
+    """
+    cases, death = 0, 0
+    outdated = session.query(WorldDaily)
+    daily = session.query(
+        Covid19.record_date,
+        func.sum(Covid19.new_cases).label('new_cases'),
+        func.sum(Covid19.new_death).label('new_death')
+    ).group_by(Covid19.record_date)
+
+    if since is not None:
+        previous = session.query(WorldDaily).filter(
+            WorldDaily.record_date < since
+        ).order_by(
+            WorldDaily.record_date.desc()
+        ).first()
+        if previous is not None:
+            cases, death = previous.total_cases or 0, previous.total_death or 0
+        outdated = outdated.filter(WorldDaily.record_date >= since)
+        daily = daily.filter(Covid19.record_date >= since)
+
+    rollups = {rollup.record_date: rollup for rollup in outdated}
+    for record in daily.order_by(Covid19.record_date).all():
+        rollup = rollups.pop(record.record_date, None)
+        if rollup is None:
+            rollup = WorldDaily(record_date=record.record_date)
+            session.add(rollup)
+        cases += record.new_cases or 0
+        death += record.new_death or 0
+        rollup.new_cases, rollup.new_death = record.new_cases, record.new_death
+        rollup.total_cases, rollup.total_death = cases, death
+
+    for rollup in rollups.values():
+        session.delete(rollup)
+
+
+def refresh_aggregates(session: Session, since: t.Optional[dd] = None) -> None:
+    """ Function refreshes all the precomputed aggregates starting from the requested date.
+
+    :param session: Session which contains updated data.
+    :param since: First date with outdated aggregates. All the history is recalculated when it's omitted.
+    """
+    refresh_country_totals(session, since)
+    refresh_world_daily(session, since)
+
+
+if __name__ == '__main__':
+    with transaction() as db_session:
+        refresh_aggregates(db_session)
@@ -0,0 +1,254 @@
+""" Module contains merging of validated rows into covid19 table. PostgreSQL is loaded through the `COPY` command
+and `INSERT ... ON CONFLICT DO UPDATE`, other databases fall back to ORM. Shards of parallel ingest stage their rows
+in the persistent table which is merged by the final task of the run.
+"""
+
+import csv
+import io
+import typing as t
+from datetime import date as dd, datetime
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from root.settings import BULK_LOAD
+from scrapping.models import Covid19, Covid19Shard
+from scrapping.parser import Covid19Row
+
+
+COLUMNS = ('record_date', 'countries_iso_alpha_2', 'country_name', 'new_death', 'new_cases')
+VALUE_COLUMNS = ('country_name', 'new_death', 'new_cases')
+STAGING_TABLE = 'covid19_staging'
+SHARD_TABLE = 'covid19_shard'
+
+
+class UpsertReport(t.NamedTuple):
+    """ Counts of rows processed by upsert. """
+    inserted: int
+    updated: int
+    unchanged: int
+    deleted: int
+
+
+class RowsStream(io.TextIOBase):
+    """ Read-only file-like object which lazily renders rows into CSV lines for the `COPY` command. """
+
+    def __init__(self, rows: t.Iterable[t.Sequence[t.Any]]) -> None:
+        super().__init__()
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: t.Optional[int] = -1) -> str:
+        size = -1 if size is None else size
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.count += 1
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0:
+            chunk, self._pending = self._pending, ''
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def supports_copy(session: Session) -> bool:
+    """ Function checks if database of the session is able to load data through `COPY`.
+
+    :param session: Session which is used for loading.
+    :return: True for PostgreSQL databases.
+    """
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def copy_rows(session: Session, rows: t.Iterable[t.Sequence[t.Any]]) -> int:
+    """ Function streams rows into temporary staging table with `COPY`.
+
+    :param session: Session of PostgreSQL database.
+    :param rows: Sequences of values ordered as `COLUMNS`.
+    :return: Number of streamed rows.
+    """
+    columns = ', '.join(COLUMNS)
+    session.execute(
+        f'CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ('
+        'record_date DATE, countries_iso_alpha_2 VARCHAR, country_name VARCHAR, new_death INTEGER, new_cases INTEGER'
+        ') ON COMMIT DROP'
+    )
+    session.execute(f'TRUNCATE {STAGING_TABLE}')
+    return copy_stream(session, f'COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)', rows)
+
+
+def copy_stream(session: Session, statement: str, rows: t.Iterable[t.Sequence[t.Any]]) -> int:
+    """ Function streams rows into PostgreSQL with the `COPY ... FROM STDIN` statement.
+
+    :param session: Session of PostgreSQL database.
+    :param statement: `COPY` statement.
+    :param rows: Sequences of values ordered as columns of the statement.
+    :return: Number of streamed rows.
+    """
+    stream = RowsStream(rows)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, stream)
+    finally:
+        cursor.close()
+    return stream.count
+
+
+def merge_staged(
+        session: Session,
+        ranges: t.Sequence[t.Tuple[dd, dd]],
+        source: str = STAGING_TABLE,
+        params: t.Optional[t.Dict[str, t.Any]] = None
+) -> UpsertReport:
+    """ Function merges staged rows into covid19 table with `INSERT ... ON CONFLICT DO UPDATE`. Only rows with changed
+    values are written. Stored rows of the requested ranges which are absent in the staging table are deleted.
+
+    :param session: Session of PostgreSQL database with filled staging table.
+    :param ranges: Date ranges which are replaced by the staged rows.
+    :param source: Staging table or subquery which selects `COLUMNS`.
+    :param params: Parameters of the subquery.
+    :return: Counts of the merged rows.
+    """
+    params = params or {}
+    columns = ', '.join(COLUMNS)
+    stored_values = ', '.join(f'covid19.{column}' for column in VALUE_COLUMNS)
+    excluded = ', '.join(f'EXCLUDED.{column}' for column in VALUE_COLUMNS)
+    assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in VALUE_COLUMNS)
+
+    staged = session.execute(
+        f'SELECT count(DISTINCT (record_date, countries_iso_alpha_2)) FROM {source} AS staged', params
+    ).scalar()
+    inserted, updated = session.execute(
+        'WITH upserted AS ('
+        f'INSERT INTO covid19 ({columns}) '
+        f'SELECT DISTINCT ON (record_date, countries_iso_alpha_2) {columns} FROM {source} AS staged '
+        'ORDER BY record_date, countries_iso_alpha_2 '
+        f'ON CONFLICT (record_date, countries_iso_alpha_2) DO UPDATE SET {assignments} '
+        f'WHERE ({stored_values}) IS DISTINCT FROM ({excluded}) '
+        'RETURNING (xmax = 0) AS inserted'
+        ') SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted',
+        params
+    ).first()
+
+    deleted = 0
+    for start, end in ranges:
+        deleted += session.execute(
+            f'DELETE FROM covid19 WHERE record_date BETWEEN :start AND :end AND NOT EXISTS ('
+            f'SELECT 1 FROM {source} AS staged WHERE staged.record_date = covid19.record_date '
+            'AND staged.countries_iso_alpha_2 = covid19.countries_iso_alpha_2)',
+            {**params, 'start': start, 'end': end}
+        ).rowcount
+    return UpsertReport(inserted, updated, staged - inserted - updated, deleted)
+
+
+def diff_rows(session: Session, rows: t.Iterable[Covid19Row], ranges: t.Sequence[t.Tuple[dd, dd]]) -> UpsertReport:
+    """ Function merges rows into covid19 table through ORM by comparison with stored records. It is used by databases
+    which are not able to load data through `COPY`.
+
+    :param session: Session of the ingest.
+    :param rows: Validated rows.
+    :param ranges: Date ranges which are replaced by the rows.
+    :return: Counts of the merged rows.
+    """
+    stored = {
+        (record.record_date, record.countries_iso_alpha_2): record
+        for record in session.query(Covid19).filter(
+            or_(*[Covid19.record_date.between(start, end) for start, end in ranges])
+        )
+    } if ranges else {}
+    new_rows = {(row.record_date, row.countries_iso_alpha_2): row for row in rows}
+
+    inserted = updated = unchanged = 0
+    for key, row in new_rows.items():
+        record = stored.pop(key, None)
+        if record is None:
+            session.add(Covid19(**row._asdict()))
+            inserted += 1
+        elif any(getattr(record, column) != getattr(row, column) for column in VALUE_COLUMNS):
+            for column in VALUE_COLUMNS:
+                setattr(record, column, getattr(row, column))
+            updated += 1
+        else:
+            unchanged += 1
+
+    for record in stored.values():
+        session.delete(record)
+    return UpsertReport(inserted, updated, unchanged, len(stored))
+
+
+def upsert_rows(session: Session, rows: t.Iterable[Covid19Row], ranges: t.Sequence[t.Tuple[dd, dd]]) -> UpsertReport:
+    """ Function replaces data of the requested date ranges by the rows writing only added, changed and removed ones.
+    PostgreSQL databases are loaded through `COPY` unless `BULK_LOAD` is turned off.
+
+    :param session: Session of the ingest.
+    :param rows: Validated rows which belong to the requested ranges.
+    :param ranges: Date ranges which are replaced by the rows.
+    :return: Counts of the merged rows.
+    """
+    if BULK_LOAD and supports_copy(session):
+        copy_rows(session, rows)
+        return merge_staged(session, ranges)
+    return diff_rows(session, rows, ranges)
+
+
+def stage_shard(session: Session, run_id: str, rows: t.Iterable[Covid19Row]) -> int:
+    """ Function stages validated rows of the shard of parallel ingest.
+
+    :param session: Session of the shard.
+    :param run_id: Identifier of the ingest run.
+    :param rows: Validated rows of the changed days of the shard.
+    :return: Number of staged rows.
+    """
+    staged_at = datetime.utcnow()
+    if BULK_LOAD and supports_copy(session):
+        columns = ', '.join(COLUMNS)
+        statement = f'COPY {SHARD_TABLE} (run_id, staged_at, {columns}) FROM STDIN WITH (FORMAT csv)'
+        return copy_stream(session, statement, ((run_id, staged_at, *row) for row in rows))
+    mappings = [{'run_id': run_id, 'staged_at': staged_at, **row._asdict()} for row in rows]
+    session.bulk_insert_mappings(Covid19Shard, mappings)
+    return len(mappings)
+
+
+def merge_shards(session: Session, run_id: str, ranges: t.Sequence[t.Tuple[dd, dd]]) -> UpsertReport:
+    """ Function replaces data of the requested date ranges by the rows staged by all the shards of the run.
+
+    :param session: Session of the final task of the run.
+    :param run_id: Identifier of the ingest run.
+    :param ranges: Date ranges which are replaced by the staged rows.
+    :return: Counts of the merged rows.
+    """
+    if BULK_LOAD and supports_copy(session):
+        source = f'(SELECT {", ".join(COLUMNS)} FROM {SHARD_TABLE} WHERE run_id = :run_id)'
+        return merge_staged(session, ranges, source, {'run_id': run_id})
+    rows = session.query(*(getattr(Covid19Shard, column) for column in COLUMNS)).filter(
+        Covid19Shard.run_id == run_id
+    ).order_by(Covid19Shard.id)
+    return diff_rows(session, (Covid19Row(*row) for row in rows), ranges)
+
+
+def clear_shards(session: Session, run_id: t.Optional[str] = None, staged_before: t.Optional[datetime] = None) -> int:
+    """ Function removes staged rows of the finished or abandoned runs.
+
+    :param session: Session of the ingest.
+    :param run_id: Identifier of the finished run.
+    :param staged_before: Rows of all the runs staged before this time are removed.
+    :return: Number of removed rows.
+    """
+    query = session.query(Covid19Shard)
+    if run_id is not None:
+        query = query.filter(Covid19Shard.run_id == run_id)
+    if staged_before is not None:
+        query = query.filter(Covid19Shard.staged_at < staged_before)
+    return query.delete(synchronize_session=False)
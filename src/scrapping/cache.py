@@ -0,0 +1,125 @@
+""" Module contains cache of the responses of the scrapping blueprint which is invalidated by the ingest. """
+
+import hashlib
+import typing as t
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, request
+from sqlalchemy.orm import Session
+
+from root.cache import VersionedCache
+from root.db import read_session
+from root.settings import CACHE_SIZE, CACHE_TTL, DATA_VERSION_CHECK_INTERVAL
+from scrapping.models import DataVersion
+
+
+DATA_VERSION_ID = 1
+
+
+class CachedResponse(t.NamedTuple):
+    """ Serialized response stored in the cache. """
+    body: bytes
+    status: int
+    mimetype: str
+
+
+class DataVersionInfo(t.NamedTuple):
+    """ Version of the data with time of the ingest which produced it. """
+    version: int
+    updated_at: t.Optional[datetime]
+
+
+def get_data_version() -> DataVersionInfo:
+    """ Function returns current version of the data.
+
+    :return: Version number with time of the last ingest. Zero version when data was never ingested.
+    """
+    record = read_session.query(DataVersion).filter(DataVersion.id == DATA_VERSION_ID).one_or_none()
+    if record is None:
+        return DataVersionInfo(0, None)
+    return DataVersionInfo(record.version, record.updated_at)
+
+
+def make_etag(version: int, key: t.Hashable) -> str:
+    """ Function calculates entity tag of the response.
+
+    :param version: Version of the data.
+    :param key: Key of the request.
+    :return: Entity tag.
+    """
+    return hashlib.sha1(repr((version, key)).encode()).hexdigest()  # nosec
+
+
+def to_utc(value: datetime) -> datetime:
+    """ Function converts datetime into naive UTC datetime with precision of HTTP dates. """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(etag: str, last_modified: t.Optional[datetime]) -> bool:
+    """ Function evaluates conditional headers of the request.
+
+    :param etag: Entity tag of the response.
+    :param last_modified: Time of the last change of the response.
+    :return: True when client already has actual response.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return to_utc(last_modified) <= to_utc(request.if_modified_since)
+    return False
+
+
+def bump_data_version(db_session: Session) -> None:
+    """ Function increases version of the data in the transaction of the ingest.
+
+    :param db_session: Session of the ingest.
+    """
+    updated = db_session.query(DataVersion).filter(DataVersion.id == DATA_VERSION_ID).update({
+        DataVersion.version: DataVersion.version + 1,
+        DataVersion.updated_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    if not updated:
+        db_session.add(DataVersion(id=DATA_VERSION_ID, version=1, updated_at=datetime.utcnow()))
+
+
+RESPONSE_CACHE = VersionedCache(CACHE_SIZE, CACHE_TTL, get_data_version, DATA_VERSION_CHECK_INTERVAL, 'responses')
+
+
+def cached(view: t.Callable[..., Response]) -> t.Callable[..., Response]:
+    """ Decorator which caches successful responses of the view by route and arguments until data is changed.
+    Responses carry `ETag` and `Last-Modified` of the data version, and conditional requests with actual validators
+    are answered with `304 Not Modified` without calling the view.
+
+    :param view: View function which returns response object.
+    :return: Decorated view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data_version = RESPONSE_CACHE.version
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        etag = make_etag(data_version.version, key)
+
+        if is_not_modified(etag, data_version.updated_at):
+            response = Response(status=304)
+        else:
+            entry = RESPONSE_CACHE.get(key)
+            if entry is not None:
+                response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+            else:
+                response = view(*args, **kwargs)
+                if response.status_code == 200 and data_version == RESPONSE_CACHE.version:
+                    RESPONSE_CACHE.set(
+                        key, CachedResponse(response.get_data(), response.status_code, response.mimetype)
+                    )
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        if data_version.updated_at is not None:
+            response.last_modified = data_version.updated_at
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
@@ -1,21 +1,32 @@
 """ Controllers that returns requested data. """
 
+import json
 import typing as t
 from datetime import date as dd
+from itertools import chain
 
+from flask import Response, stream_with_context
 from flask_apispec import use_kwargs, marshal_with, doc
 from marshmallow import fields
-from sqlalchemy import func
+from sqlalchemy import tuple_
 from sqlalchemy.orm.exc import NoResultFound
-from root.db import session
+from root.db import read_session
 from root.app import ERROR_SCHEMA
 
 from scrapping.bp import bp
-from scrapping.models import Covid19
-from scrapping.schemas import ARGUMENTS_SCHEMA, COVID19_SCHEMA
+from scrapping.cache import cached
+from scrapping.models import Covid19, WorldDaily
+from scrapping.schemas import (
+    ARGUMENTS_SCHEMA, BATCH_RESULT_SCHEMA, BATCH_SCHEMA, COVID19_SCHEMA, SERIES_ARGUMENTS_SCHEMA
+)
+from scrapping.snapshot import WORLD, current_snapshot
+
+
+SERIES_BATCH = 500
 
 
 @bp.route('/<country>/<date>')
+@cached
 @doc(params={
     'date': {'type': 'date', 'description': 'Date in format `YYYY-mm-DD`'},
     'country': {'description': 'Country name in ISO Alpha-2 format. Example: "UA" - Ukraine'}
@@ -32,14 +43,58 @@ def country_by_date(country: str, date: str) -> t.Dict[str, t.Union[dd, str, int
     """
     country_upper = country.upper()
     arguments = ARGUMENTS_SCHEMA.load({'date': date})
-    record = session.query(Covid19).filter(
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        result = snapshot.by_date(country_upper, arguments['date'])
+        if result is None:
+            raise NoResultFound
+        return result
+
+    record = read_session.query(Covid19).filter(
         Covid19.countries_iso_alpha_2 == country_upper,
         Covid19.record_date == arguments['date']
     ).one()
     return record
 
 
+@bp.route('/<country>/series')
+@doc(params={
+    'country': {'description': 'Country name in ISO Alpha-2 format. Example: "UA" - Ukraine'}
+})
+@use_kwargs(SERIES_ARGUMENTS_SCHEMA, locations=['query'])
+@marshal_with(COVID19_SCHEMA, code=200, description='Streams daily data of the requested country in date order')
+@marshal_with(ERROR_SCHEMA, code=422, description='Validation error')
+@marshal_with(ERROR_SCHEMA, code=404, description='No data found for requested value')
+def country_series(country: str, date_from: dd = None, date_to: dd = None, output: str = 'ndjson') -> Response:
+    """ Controller that streams daily data of the requested country for the range of dates. Rows are read through
+    server-side cursor by batches, so memory usage doesn't depend on the length of the range.
+
+    :param country: Name of the country which expressed in ISO Alpha-2 format. Example: "UA" - Ukraine
+    :param date_from: First date of the range. Range is open when it's omitted.
+    :param date_to: Last date of the range. Range is open when it's omitted.
+    :param output: Format of the stream: "ndjson" - JSON object per line, "json" - JSON array.
+    :return: Number of cases and death registered in specific country for every day of the range.
+    """
+    query = read_session.query(Covid19).filter(Covid19.countries_iso_alpha_2 == country.upper())
+    if date_from is not None:
+        query = query.filter(Covid19.record_date >= date_from)
+    if date_to is not None:
+        query = query.filter(Covid19.record_date <= date_to)
+    records = iter(query.order_by(Covid19.record_date).execution_options(stream_results=True).yield_per(SERIES_BATCH))
+
+    first = next(records, None)
+    if first is None:
+        raise NoResultFound
+    lines = (json.dumps(COVID19_SCHEMA.dump(record)) for record in chain([first], records))
+
+    if output == 'json':
+        chunks = chain(['['], (f',{line}' if index else line for index, line in enumerate(lines)), [']'])
+        return Response(stream_with_context(chunks), mimetype='application/json')
+    return Response(stream_with_context(f'{line}\n' for line in lines), mimetype='application/x-ndjson')
+
+
 @bp.route('/<country>')
+@cached
 @doc(params={
     'country': {'description': 'Country name in ISO Alpha-2 format. Example: "UA" - Ukraine'}
 })
@@ -56,19 +111,23 @@ def total_to_date_by_country(country: str, date: dd = None) -> t.Dict[str, t.Uni
     """
     date = date or dd.today()
     country_upper = country.upper()
-    record = session.query(
-        func.max(Covid19.record_date).label('date'),
-        func.sum(Covid19.new_cases).label('total_cases'),
-        func.sum(Covid19.new_death).label('total_death'),
-        Covid19.country_name
-    ).group_by(
-        Covid19.country_name
-    ).filter(
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        result = snapshot.total_to_date(country_upper, date)
+        if result is None:
+            raise NoResultFound
+        return result
+
+    record = read_session.query(Covid19).filter(
         Covid19.countries_iso_alpha_2 == country_upper,
         Covid19.record_date <= date
-    ).one()
+    ).order_by(
+        Covid19.record_date.desc()
+    ).first()
+    if record is None:
+        raise NoResultFound
     result = {
-        "record_date": record.date,
+        "record_date": record.record_date,
         "country_name": record.country_name,
         "new_death": record.total_death,
         "new_cases": record.total_cases,
@@ -77,6 +136,7 @@ def total_to_date_by_country(country: str, date: dd = None) -> t.Dict[str, t.Uni
 
 
 @bp.route('/world')
+@cached
 @use_kwargs({'date': fields.Date()}, locations=['query'])
 @marshal_with(COVID19_SCHEMA, code=200, description='Returns calculated data fro the whole World')
 @marshal_with(ERROR_SCHEMA, code=422, description='Validation error')
@@ -89,15 +149,22 @@ def world_total_to_date(date: dd = None) -> t.Dict[str, t.Union[dd, str, int]]:
     World.
     """
     date = date or dd.today()
-    record = session.query(
-        func.max(Covid19.record_date).label('date'),
-        func.sum(Covid19.new_cases).label('total_cases'),
-        func.sum(Covid19.new_death).label('total_death')
-    ).filter(Covid19.record_date <= date).one()
-    if record.date is None:
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        result = snapshot.total_to_date(WORLD, date)
+        if result is None:
+            raise NoResultFound
+        return result
+
+    record = read_session.query(WorldDaily).filter(
+        WorldDaily.record_date <= date
+    ).order_by(
+        WorldDaily.record_date.desc()
+    ).first()
+    if record is None:
         raise NoResultFound
     result = {
-        "record_date": record.date,
+        "record_date": record.record_date,
         "country_name": 'World',
         "new_death": record.total_death,
         "new_cases": record.total_cases,
@@ -106,6 +173,7 @@ def world_total_to_date(date: dd = None) -> t.Dict[str, t.Union[dd, str, int]]:
 
 
 @bp.route('/world/<date>')
+@cached
 @doc(params={
     'date': {'type': 'date', 'description': 'Date in format `YYYY-mm-DD`'}
 })
@@ -119,12 +187,14 @@ def world_total_by_date(date: str) -> t.Dict[str, t.Union[dd, str, int]]:
     :return: Calculated data about amount of cases and death in whole World during specific day.
     """
     arguments = ARGUMENTS_SCHEMA.load({'date': date})
-    record = session.query(
-        func.sum(Covid19.new_cases).label('new_cases'),
-        func.sum(Covid19.new_death).label('new_death')
-    ).filter(Covid19.record_date == arguments['date']).one()
-    if record.new_cases is None:
-        raise NoResultFound
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        result = snapshot.by_date(WORLD, arguments['date'])
+        if result is None:
+            raise NoResultFound
+        return result
+
+    record = read_session.query(WorldDaily).filter(WorldDaily.record_date == arguments['date']).one()
     result = {
         "record_date": arguments['date'],
         "country_name": 'World',
@@ -132,3 +202,47 @@ def world_total_by_date(date: str) -> t.Dict[str, t.Union[dd, str, int]]:
         "new_death": record.new_death,
     }
     return result
+
+
+@bp.route('/batch', methods=['POST'])
+@use_kwargs(BATCH_SCHEMA, locations=['json'])
+@marshal_with(BATCH_RESULT_SCHEMA, code=200, description='Returns data for every requested country and date')
+@marshal_with(ERROR_SCHEMA, code=422, description='Validation error')
+def batch_by_date(
+        items: t.List[t.Dict[str, t.Any]] = None,
+        countries: t.List[str] = None,
+        date: dd = None
+) -> t.Dict[str, t.List[t.Dict[str, t.Any]]]:
+    """ Controller that returns data for the list of countries and dates with a single query.
+
+    :param items: List of countries in ISO Alpha-2 format with dates. Example: [{"country": "UA", "date": "2020-05-27"}]
+    :param countries: List of countries in ISO Alpha-2 format which are requested for the same date.
+    :param date: Date which expressed in format 2020-01-30. It is used with list of countries.
+    :return: Number of cases and death for every requested item in the requested order. Missing items are reported
+    as not found.
+    """
+    keys = [
+        (item['country'].upper(), item['date']) for item in items
+    ] if items else [
+        (country.upper(), date) for country in countries or []
+    ]
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        found = ((key, snapshot.by_date(*key)) for key in set(keys))
+        records: t.Dict[t.Tuple[str, dd], t.Any] = {key: record for key, record in found if record is not None}
+    else:
+        records = {
+            (record.countries_iso_alpha_2, record.record_date): record
+            for record in read_session.query(Covid19).filter(
+                tuple_(Covid19.countries_iso_alpha_2, Covid19.record_date).in_(set(keys))
+            )
+        }
+    result = [
+        COVID19_SCHEMA.dump(records[key]) if key in records else {
+            'country': key[0],
+            'date': key[1].isoformat(),
+            'message': 'Not Found',
+        }
+        for key in keys
+    ]
+    return {'items': result}
@@ -0,0 +1,72 @@
+""" Module contains fingerprints of the data file which allow to detect changed data without touching database. """
+
+import hashlib
+import typing as t
+from datetime import date as dd, timedelta
+from pathlib import Path
+
+from scrapping.parser import Covid19Row
+
+
+BLOCK_SIZE = 1024 * 1024
+
+
+class Fingerprint(t.NamedTuple):
+    """ Fingerprint of the whole data file. """
+    sha256: str
+    size: int
+
+
+def file_fingerprint(path: Path) -> Fingerprint:
+    """ Function calculates fingerprint of the file.
+
+    :param path: Path to the data file.
+    :return: Hash and size of the file.
+    """
+    file_hash = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(BLOCK_SIZE), b''):
+            file_hash.update(block)
+            size += len(block)
+    return Fingerprint(file_hash.hexdigest(), size)
+
+
+def daily_digests(rows: t.Iterable[Covid19Row]) -> t.Dict[dd, str]:
+    """ Function calculates digest of the rows of every day.
+
+    :param rows: Validated rows of the data file.
+    :return: Mapping of the date to the digest of its rows.
+    """
+    hashes: t.Dict[dd, t.Any] = {}
+    for row in rows:
+        if row.record_date not in hashes:
+            hashes[row.record_date] = hashlib.sha256()
+        hashes[row.record_date].update(repr(tuple(row)).encode())
+    return {record_date: row_hash.hexdigest() for record_date, row_hash in hashes.items()}
+
+
+def changed_dates(digests: t.Dict[dd, str], stored: t.Dict[dd, str]) -> t.Set[dd]:
+    """ Function compares digests of the new file with digests of the ingested data.
+
+    :param digests: Digests of the new data file.
+    :param stored: Digests of the ingested data.
+    :return: Dates which were added, changed or removed.
+    """
+    changed = {record_date for record_date, digest in digests.items() if stored.get(record_date) != digest}
+    return changed | (stored.keys() - digests.keys())
+
+
+def date_ranges(dates: t.Iterable[dd]) -> t.List[t.Tuple[dd, dd]]:
+    """ Function groups dates into continuous ranges.
+
+    :param dates: Unordered dates.
+    :return: Ordered list of the first and the last date of each range.
+    """
+    ranges: t.List[t.Tuple[dd, dd]] = []
+    for current in sorted(dates):
+        if ranges and ranges[-1][1] + timedelta(days=1) == current:
+            ranges[-1] = (ranges[-1][0], current)
+        else:
+            ranges.append((current, current))
+    return ranges
@@ -1,6 +1,8 @@
 """ Module that contains template of the database. """
 
-from sqlalchemy import Column, Integer, String, Date, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, UniqueConstraint, Index
 
 from root.db import BaseModel, db
 
@@ -10,6 +12,7 @@ class Covid19(BaseModel):  # type: ignore
     __tablename__ = 'covid19'
     __table_args__ = (
         UniqueConstraint('record_date', 'countries_iso_alpha_2'),
+        Index('ix_covid19_country_date', 'countries_iso_alpha_2', 'record_date'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -18,6 +21,61 @@ class Covid19(BaseModel):  # type: ignore
     country_name = Column(String)
     new_death = Column(Integer)
     new_cases = Column(Integer)
+    total_death = Column(Integer)
+    total_cases = Column(Integer)
+
+
+class Covid19Shard(BaseModel):  # type: ignore
+    """ Model of the rows staged by the shards of parallel ingest until the final merge of the run. """
+    __tablename__ = 'covid19_shard'
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String(32), index=True)
+    record_date = Column(Date)
+    countries_iso_alpha_2 = Column(String)
+    country_name = Column(String)
+    new_death = Column(Integer)
+    new_cases = Column(Integer)
+    staged_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WorldDaily(BaseModel):  # type: ignore
+    """ Model of daily rollup of our data for the whole World. """
+    __tablename__ = 'world_daily'
+
+    record_date = Column(Date, primary_key=True)
+    new_death = Column(Integer)
+    new_cases = Column(Integer)
+    total_death = Column(Integer)
+    total_cases = Column(Integer)
+
+
+class DataFile(BaseModel):  # type: ignore
+    """ Model of fingerprint of the successfully ingested data file. """
+    __tablename__ = 'data_file'
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64))
+    size = Column(BigInteger)
+    last_date = Column(Date)
+    ingested_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DailyDigest(BaseModel):  # type: ignore
+    """ Model of digest of the rows of the ingested data file for a single day. """
+    __tablename__ = 'daily_digest'
+
+    record_date = Column(Date, primary_key=True)
+    digest = Column(String(64))
+
+
+class DataVersion(BaseModel):  # type: ignore
+    """ Model of the version of our data which is increased by every ingest that changes data. """
+    __tablename__ = 'data_version'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
 
 if __name__ == '__main__':
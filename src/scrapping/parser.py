@@ -0,0 +1,93 @@
+""" Module contains fast parser of the rows of WHO data file. It follows the rules of `Covid19LoadSchema` without
+marshmallow machinery, so it is cheap enough to run over every row of the file.
+"""
+
+import re
+import typing as t
+from datetime import date as dd
+from itertools import islice
+
+
+CHUNK_SIZE = 5000
+DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})$')
+INVALID_DATE = 'Not a valid date.'
+INVALID_INTEGER = 'Not a valid integer.'
+
+Messages = t.Dict[str, t.List[str]]
+
+
+class Covid19Row(t.NamedTuple):
+    """ Validated row of the data file. Fields are ordered as columns of bulk loading. """
+    record_date: dd
+    countries_iso_alpha_2: str
+    country_name: str
+    new_death: int
+    new_cases: int
+
+
+class Chunk(t.NamedTuple):
+    """ Result of parsing of the chunk of rows. """
+    rows: t.List[Covid19Row]
+    errors: t.List[t.Tuple[int, Messages]]
+
+
+def parse_date(value: str) -> dd:
+    """ Function parses date trimmed from the timestamp in the same way as `LenientDate` does.
+
+    :param value: Date or timestamp string. Example: "2020-01-30T00:00:00Z"
+    :return: Parsed date.
+    """
+    match = DATE_RE.match(value[:10])
+    if match is None:
+        raise ValueError(value)
+    year, month, day = match.groups()
+    return dd(int(year), int(month), int(day))
+
+
+def parse_row(row: t.List[str]) -> t.Union[Covid19Row, Messages]:
+    """ Function validates single row of the data file.
+
+    :param row: Row of the data file.
+    :return: Validated row or error messages in format of marshmallow.
+    """
+    messages: Messages = {}
+    record_date = new_cases = new_death = None
+    try:
+        record_date = parse_date(row[0])
+    except ValueError:
+        messages['record_date'] = [INVALID_DATE]
+    try:
+        new_death = int(row[6])
+    except ValueError:
+        messages['new_death'] = [INVALID_INTEGER]
+    try:
+        new_cases = int(row[4])
+    except ValueError:
+        messages['new_cases'] = [INVALID_INTEGER]
+    if messages:
+        return messages
+    return Covid19Row(record_date, row[1], row[2] or row[1], new_death, new_cases)  # type: ignore
+
+
+def parse_chunks(rows: t.Iterable[t.List[str]], chunk_size: int = CHUNK_SIZE) -> t.Iterator[Chunk]:
+    """ Function validates rows of the data file chunk by chunk.
+
+    :param rows: Rows of the data file without headers.
+    :param chunk_size: Maximum number of rows in one chunk.
+    :return: Iterator over validated chunks. Errors are reported with zero-based index of the row.
+    """
+    iterator = iter(rows)
+    offset = 0
+    while True:
+        batch = list(islice(iterator, chunk_size))
+        if not batch:
+            return
+        chunk = Chunk([], [])
+        for index, row in enumerate(batch, offset):
+            result = parse_row(row)
+            if isinstance(result, dict):
+                chunk.errors.append((index, result))
+            else:
+                chunk.rows.append(result)
+        offset += len(batch)
+        yield chunk
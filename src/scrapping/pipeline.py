@@ -0,0 +1,96 @@
+""" Module contains instrumentation of the ingest pipeline. Every stage records its wall time, number of processed
+rows and optionally peak of the memory allocated during the stage.
+"""
+
+import tracemalloc
+import typing as t
+from contextlib import contextmanager
+from logging import getLogger
+from time import monotonic
+
+from root.metrics import observe_stage
+from root.settings import INGEST_TRACE_MEMORY
+from scrapping.bulk import UpsertReport
+
+
+logger = getLogger()
+
+
+class StageReport(t.NamedTuple):
+    """ Measurements of the stage of the ingest. """
+    name: str
+    seconds: float
+    rows: int
+    peak_memory: t.Optional[int]
+
+    @property
+    def rows_per_second(self) -> float:
+        """ Throughput of the stage. """
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class StageCounter:
+    """ Mutable counter of the rows processed by the running stage. """
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+
+class IngestReport(t.NamedTuple):
+    """ Report of the ingest run. """
+    status: str
+    stages: t.List[StageReport]
+    changed_days: int = 0
+    upsert: t.Optional[UpsertReport] = None
+
+    @property
+    def seconds(self) -> float:
+        """ Total time of the measured stages. """
+        return sum(stage.seconds for stage in self.stages)
+
+
+class Pipeline:
+    """ Recorder of the stages of one ingest run. """
+
+    def __init__(self, trace_memory: bool = INGEST_TRACE_MEMORY) -> None:
+        self.trace_memory = trace_memory
+        self.stages: t.List[StageReport] = []
+
+    @contextmanager
+    def stage(self, name: str) -> t.Iterator[StageCounter]:
+        """ Context manager which measures the stage. Memory is traced only for allocations made during the stage.
+
+        :param name: Name of the stage.
+        :return: Counter of processed rows which is filled by the stage.
+        """
+        counter = StageCounter()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        started = monotonic()
+        try:
+            with observe_stage(name):
+                yield counter
+        finally:
+            seconds = monotonic() - started
+            peak_memory = None
+            if tracing:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            stage = StageReport(name, seconds, counter.rows, peak_memory)
+            self.stages.append(stage)
+            logger.info(
+                'Stage {} took {:.3f} s, {} rows ({:.0f} rows/sec), peak memory: {}.',
+                name, seconds, stage.rows, stage.rows_per_second,
+                'not traced' if peak_memory is None else f'{peak_memory / 2 ** 20:.1f} MiB'
+            )
+
+    def report(self, status: str, changed_days: int = 0, upsert: t.Optional[UpsertReport] = None) -> IngestReport:
+        """ Method builds report of the run.
+
+        :param status: Result of the run: "not_modified", "unchanged", "dispatched" or "ingested".
+        :param changed_days: Number of the days changed by the run.
+        :param upsert: Counts of the merged rows.
+        :return: Report with measurements of all the stages.
+        """
+        return IngestReport(status, list(self.stages), changed_days, upsert)
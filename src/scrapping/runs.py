@@ -0,0 +1,64 @@
+""" Module contains directories of the ingest runs. Every run downloads data file into its own directory, so
+overlapping runs never write the same file. Directory of the sharded run is kept until its last task finishes, which
+marks the run as in flight for the following runs.
+"""
+
+import shutil
+import typing as t
+from logging import getLogger
+from pathlib import Path
+from time import time
+
+from root.settings import DOWNLOAD_DIR, INGEST_RUN_TIMEOUT
+
+
+logger = getLogger()
+RUNS_DIR = 'runs'
+
+
+def run_directory(run_id: str) -> Path:
+    """ Function returns directory of the run.
+
+    :param run_id: Identifier of the ingest run.
+    :return: Path of the directory.
+    """
+    return Path(DOWNLOAD_DIR) / RUNS_DIR / run_id
+
+
+def active_runs(timeout: float = INGEST_RUN_TIMEOUT) -> t.List[str]:
+    """ Function finds runs which are in flight. Directories of the runs which are older than the timeout are
+    considered abandoned and removed.
+
+    :param timeout: Seconds after which the run is abandoned.
+    :return: Identifiers of the active runs.
+    """
+    runs_dir = Path(DOWNLOAD_DIR) / RUNS_DIR
+    if not runs_dir.exists():
+        return []
+    active = []
+    for directory in runs_dir.iterdir():
+        if time() - directory.stat().st_mtime > timeout:
+            logger.warning('Directory of the abandoned ingest run {} is removed.', directory.name)
+            shutil.rmtree(directory, ignore_errors=True)
+        else:
+            active.append(directory.name)
+    return active
+
+
+def start_run(run_id: str) -> Path:
+    """ Function creates directory of the run.
+
+    :param run_id: Identifier of the ingest run.
+    :return: Path of the directory.
+    """
+    directory = run_directory(run_id)
+    directory.mkdir(parents=True)
+    return directory
+
+
+def finish_run(run_id: str) -> None:
+    """ Function removes directory of the run with the downloaded file.
+
+    :param run_id: Identifier of the ingest run.
+    """
+    shutil.rmtree(run_directory(run_id), ignore_errors=True)
@@ -2,12 +2,16 @@
 
 from datetime import date as dd
 
-from marshmallow import Schema, fields, pre_load, post_load
+from marshmallow import Schema, ValidationError, fields, pre_load, post_load, validates_schema
+from marshmallow.validate import Length, OneOf
 
 from root.utils import APISchema
 from scrapping.models import Covid19
 
 
+BATCH_MAX_ITEMS = 200
+
+
 class LenientDate(fields.Date):
     """ More lenient version of the date field that allow to load date objects. """
     def _deserialize(self, value, attr, data, **kwargs):
@@ -29,6 +33,45 @@ class ArgumentsSchema(Schema):
     date = fields.Date(missing=dd.today)
 
 
+class SeriesArgumentsSchema(Schema):
+    """ Schema for parsing of arguments of time series request. """
+    date_from = fields.Date(data_key='from')
+    date_to = fields.Date(data_key='to')
+    output = fields.Str(data_key='format', missing='ndjson', validate=OneOf(['ndjson', 'json']))
+
+    @validates_schema
+    def validate_range(self, data, **_kwargs):  # pylint: disable=no-self-use
+        """ Beginning of the range shouldn't be after its end. """
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise ValidationError('Beginning of the range is after its end.', 'from')
+
+
+class BatchItemSchema(Schema):
+    """ Schema of the single item of batch request. """
+    country = fields.Str(required=True)
+    date = fields.Date(required=True)
+
+
+class BatchSchema(Schema):
+    """ Schema of batch request: list of countries with dates or list of countries with one date. """
+    items = fields.List(fields.Nested(BatchItemSchema), validate=Length(min=1, max=BATCH_MAX_ITEMS))
+    countries = fields.List(fields.Str(), validate=Length(min=1, max=BATCH_MAX_ITEMS))
+    date = fields.Date()
+
+    @validates_schema
+    def validate_request(self, data, **_kwargs):  # pylint: disable=no-self-use
+        """ Request should contain either items or countries with date. """
+        if ('items' in data) == ('countries' in data):
+            raise ValidationError('Either items or countries should be requested.')
+        if 'countries' in data and 'date' not in data:
+            raise ValidationError('Missing data for required field.', 'date')
+
+
+class BatchResultSchema(APISchema):
+    """ Schema of batch response. Items are either in format of the main schema or not found errors. """
+    items = fields.List(fields.Dict())
+
+
 class Covid19LoadSchema(Schema):
     """ Schema for loading raw covid19 data. """
     __model__ = Covid19
@@ -39,12 +82,11 @@ class Covid19LoadSchema(Schema):
     new_death = fields.Int()
     new_cases = fields.Int()
 
-    @staticmethod
     @pre_load
-    def normalize_data(data, **_kwargs):
+    def normalize_data(self, data, **_kwargs):  # pylint: disable=no-self-use
         """ Use ISO as Country when it empty, trim date timestamp to the date. """
         data['record_date'] = data['record_date'][:10]
-        if data.get('country_name') is None:
+        if not data.get('country_name'):
             data['country_name'] = data['countries_iso_alpha_2']
         return data
 
@@ -54,6 +96,9 @@ class Covid19LoadSchema(Schema):
         return self.__model__(**data)
 
 
+BATCH_SCHEMA = BatchSchema()
+BATCH_RESULT_SCHEMA = BatchResultSchema()
 COVID19_SCHEMA = Covid19Schema()
 COVID19_LOAD_SCHEMA = Covid19LoadSchema()
 ARGUMENTS_SCHEMA = ArgumentsSchema()
+SERIES_ARGUMENTS_SCHEMA = SeriesArgumentsSchema()
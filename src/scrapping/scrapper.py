@@ -1,7 +1,22 @@
 """ Module to scrap data for the project. """
 
+import ctypes
+import ctypes.util
+import json
+import os
+import re
+import select
+import struct
+import sys
+import typing as t
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from logging import getLogger
 from pathlib import Path
-from time import sleep
+from time import monotonic, sleep
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlparse
+from urllib.request import Request, urlopen
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -9,6 +24,17 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support.expected_conditions import presence_of_element_located
 
+from root.settings import DATA_URL, DOWNLOAD_DIR, FETCHER, FETCHER_FALLBACK, SOURCE_URL
+
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 30
+MAX_WAIT_PERIOD = 1.0
+LINK_RE = re.compile(r'<a\s[^>]*\bdownload\b[^>]*>', re.IGNORECASE)
+HREF_RE = re.compile(r'\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+logger = getLogger()
+
 
 def get_config(download_path: Path) -> Options:
     """ Function with parameters of web-driver which is needed to download data.
@@ -25,40 +51,272 @@ def get_config(download_path: Path) -> Options:
     })
     return chrome_options
 
+
+class Inotify:
+    """ Minimal inotify watcher of the directory which is used to get notified about downloaded files on Linux. """
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    COMPLETED = IN_CLOSE_WRITE | IN_MOVED_TO
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.descriptor < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.descriptor, os.fsencode(directory), mask) < 0:
+            self.close()
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+    def read(self, timeout: float) -> t.List[t.Tuple[int, str]]:
+        """ Method waits for events in the watched directory.
+
+        :param timeout: Maximum time of waiting in seconds.
+        :return: Masks of events with names of the files. Empty list when timeout is expired.
+        """
+        ready, _, _ = select.select([self.descriptor], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.descriptor, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            _watch, mask, _cookie, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        """ Method stops watching. """
+        os.close(self.descriptor)
+
+
+@contextmanager
+def watch_directory(directory: Path) -> t.Iterator[t.Optional[Inotify]]:
+    """ Context manager which watches directory with inotify when it is available.
+
+    :param directory: Watched directory.
+    :return: Watcher or None on the platforms without inotify.
+    """
+    watcher = None
+    if sys.platform.startswith('linux'):
+        try:
+            watcher = Inotify(directory)
+        except (OSError, AttributeError) as err:
+            logger.warning('inotify is not available: {}', err)
+    try:
+        yield watcher
+    finally:
+        if watcher is not None:
+            watcher.close()
+
+
+def completed_size(file_path: Path) -> t.Optional[int]:
+    """ Function returns size of the file when it is not downloading anymore.
+
+    :param file_path: Path to the downloaded file.
+    :return: Size of the file or None when file doesn't exist or Chrome is still writing it.
+    """
+    if file_path.with_name(f'{file_path.name}.crdownload').exists():
+        return None
+    try:
+        return file_path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
 def wait_for(file_path: Path, wait_period: float = 0.1, max_wait: int = 60 * 2) -> None:
-    """ Function that waits for downloading file.
+    """ Function that waits for downloading file. Download is finished when the file exists without partial download
+    and its size is stable. On Linux the function is woken up by inotify events and returns as soon as the file is
+    closed or renamed into place, on other platforms it polls with growing timeouts.
 
     :param file_path: path to downloaded file
-    :param wait_period: timeouts between retries
+    :param wait_period: period of stable size and initial timeout between retries
     :param max_wait: maximum time of waiting for downloading
     """
-    total_wait = 0.0
+    deadline = monotonic() + max_wait
+    delay = wait_period
+    last_size: t.Optional[int] = None
 
-    while not file_path.exists():
-        if total_wait >= max_wait:
-            raise ValueError("We're waiting too much!")
+    with watch_directory(file_path.parent) as watcher:
+        while True:
+            size = completed_size(file_path)
+            if size is not None and size == last_size:
+                return
+            last_size = size
 
-        sleep(wait_period)
-        total_wait += wait_period
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise ValueError("We're waiting too much!")
 
+            if watcher is None:
+                sleep(min(delay, remaining))
+                delay = min(delay * 2, MAX_WAIT_PERIOD)
+                continue
 
-def download_csv(filename: str) -> Path:
-    """ Function that downloads file with data.
+            events = watcher.read(min(wait_period, remaining) if size is not None else remaining)
+            completed = any(mask & Inotify.COMPLETED and name == file_path.name for mask, name in events)
+            if completed and completed_size(file_path) is not None:
+                return
 
-    :param filename: Name of the downloading file.
-    :return: Path to downloaded file.
+
+class Fetcher(ABC):
+    """ Base class of backends which download data file from the source. """
+
+    @abstractmethod
+    def fetch(self, download_file: Path) -> t.Optional[Path]:
+        """ Method downloads data file.
+
+        :param download_file: Path where file should be placed.
+        :return: Path to downloaded file or None when file was not modified since the last download.
+        """
+
+
+class SeleniumFetcher(Fetcher):
+    """ Backend which clicks download link of the source page in headless Chrome. """
+
+    def fetch(self, download_file: Path) -> t.Optional[Path]:
+        if download_file.exists():
+            download_file.unlink()
+
+        with webdriver.Chrome(options=get_config(download_file.parent)) as driver:
+            driver.get(SOURCE_URL)
+            presence = presence_of_element_located([By.XPATH, "//div/a[@download]"])
+            download_button = WebDriverWait(driver, 30).until(presence)
+
+            download_button.click()
+            wait_for(download_file)
+        return download_file
+
+
+class HttpFetcher(Fetcher):
+    """ Backend which downloads data file with plain HTTP requests. URL of the file is resolved from the source page
+    once and cached. File is streamed to disk by chunks and requested conditionally with `ETag` and `Last-Modified`
+    validators of the previous download, which are kept in the state directory shared by the runs.
     """
-    download_folder = Path(__file__).parent.parent
-    download_file = download_folder / filename
 
-    if download_file.exists():
-        download_file.unlink()
+    def __init__(
+            self,
+            source_url: str = SOURCE_URL,
+            data_url: t.Optional[str] = DATA_URL,
+            state_dir: t.Optional[Path] = None
+    ) -> None:
+        self.source_url = source_url
+        self.data_url = data_url
+        self.state_dir = state_dir
+
+    @staticmethod
+    def open(url: str, headers: t.Optional[t.Dict[str, str]] = None):
+        """ Method sends GET request to http(s) URL.
+
+        :param url: Requested URL.
+        :param headers: Additional request headers.
+        :return: Response object.
+        """
+        if urlparse(url).scheme not in {'http', 'https'}:
+            raise ValueError(f'Unsupported URL: {url}')
+        return urlopen(Request(url, headers=headers or {}), timeout=TIMEOUT)  # nosec
+
+    def resolve_url(self, filename: str) -> str:
+        """ Method finds URL of the data file on the source page.
+
+        :param filename: Name of the data file which is used when page has no download link.
+        :return: URL of the data file.
+        """
+        if self.data_url is None:
+            with self.open(self.source_url) as response:
+                page = response.read().decode('utf-8', 'replace')
+            hrefs = (HREF_RE.search(link) for link in LINK_RE.findall(page))
+            links = [href.group(1) for href in hrefs if href is not None]
+            self.data_url = urljoin(self.source_url, links[0] if links else filename)
+        return self.data_url
+
+    def meta_file(self, download_file: Path) -> Path:
+        """ Method returns path of validators of the previous download.
+
+        :param download_file: Path where file should be placed.
+        :return: Path of the validators in the state directory, or next to the file when it's not configured.
+        """
+        return (self.state_dir or download_file.parent) / f'{download_file.name}.meta'
+
+    def fetch(self, download_file: Path) -> t.Optional[Path]:
+        meta_file = self.meta_file(download_file)
+        meta = json.loads(meta_file.read_text()) if meta_file.exists() else {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = self.open(self.resolve_url(download_file.name), headers)
+        except HTTPError as err:
+            if err.code == 304:
+                return None
+            if err.code == 404:
+                self.data_url = DATA_URL
+            raise
+
+        part_file = download_file.with_name(f'{download_file.name}.part')
+        with response, open(part_file, 'wb') as output:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                output.write(chunk)
+            meta = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        os.replace(part_file, download_file)
+        meta_file.write_text(json.dumps(meta))
+        return download_file
+
 
-    with webdriver.Chrome(options=get_config(download_folder)) as driver:
-        driver.get("https://covid19.who.int/")
-        presence = presence_of_element_located([By.XPATH, "//div/a[@download]"])
-        download_button = WebDriverWait(driver, 30).until(presence)
+FETCHERS: t.Dict[str, t.Callable[[], Fetcher]] = {
+    'http': lambda: HttpFetcher(state_dir=Path(DOWNLOAD_DIR)),
+    'selenium': SeleniumFetcher,
+}
+_fetchers: t.Dict[str, Fetcher] = {}
 
-        download_button.click()
-        wait_for(download_file)
-    return download_file
+
+def get_fetcher(name: str) -> Fetcher:
+    """ Function returns shared instance of the fetcher backend.
+
+    :param name: Name of the backend: "http" or "selenium".
+    :return: Fetcher instance.
+    """
+    if name not in _fetchers:
+        _fetchers[name] = FETCHERS[name]()
+    return _fetchers[name]
+
+
+def forget_download(filename: str) -> None:
+    """ Function removes validators of the previous download, so the next run downloads the file unconditionally.
+    It is used when the downloaded file was not ingested.
+
+    :param filename: Name of the downloaded file.
+    """
+    meta_file = Path(DOWNLOAD_DIR) / f'{filename}.meta'
+    if meta_file.exists():
+        meta_file.unlink()
+
+
+def download_csv(filename: str, directory: t.Optional[Path] = None) -> t.Optional[Path]:
+    """ Function that downloads file with data. When configured backend fails, function retries download with the
+    fallback backend.
+
+    :param filename: Name of the downloading file.
+    :param directory: Directory of the run, `DOWNLOAD_DIR` is used when it's omitted.
+    :return: Path to downloaded file or None when file was not modified since the last download.
+    """
+    download_folder = directory or Path(DOWNLOAD_DIR)
+    download_file = download_folder / filename
+    try:
+        return get_fetcher(FETCHER).fetch(download_file)
+    except (OSError, ValueError) as err:
+        if not FETCHER_FALLBACK or FETCHER_FALLBACK == FETCHER:
+            raise
+        logger.warning('Download with {} backend failed: {}. Fallback to {} backend...', FETCHER, err, FETCHER_FALLBACK)
+    return get_fetcher(FETCHER_FALLBACK).fetch(download_file)
@@ -0,0 +1,76 @@
+""" Module contains splitting of the data file into shards of parallel ingest. The file is split by date ranges,
+because digests of the ingested data are calculated for whole days: every shard validates its days, compares their
+digests with the stored ones and stages rows of the changed days only.
+"""
+
+import typing as t
+from datetime import date as dd, timedelta
+
+from scrapping.parser import parse_date
+
+
+DateRange = t.Tuple[dd, dd]
+
+
+def date_span(reader: t.Iterable[t.List[str]]) -> t.Optional[DateRange]:
+    """ Function finds the first and the last date of the data file. Rows with invalid date are ignored.
+
+    :param reader: Rows of the data file without headers.
+    :return: Span of the dates or None when the file has no valid dates.
+    """
+    first = last = None
+    for row in reader:
+        try:
+            record_date = parse_date(row[0])
+        except (IndexError, ValueError):
+            continue
+        if first is None or record_date < first:
+            first = record_date
+        if last is None or record_date > last:
+            last = record_date
+    if first is None or last is None:
+        return None
+    return first, last
+
+
+def split_span(span: t.Optional[DateRange], shards: int) -> t.List[DateRange]:
+    """ Function splits span of the dates into continuous ranges of almost equal number of days. The first range is
+    open to the past and the last one is open to the future, so stored days which were removed from the file are
+    covered by some shard as well.
+
+    :param span: The first and the last date of the data file.
+    :param shards: Maximum number of ranges.
+    :return: Ordered ranges which cover all the dates.
+    """
+    if span is None:
+        return [(dd.min, dd.max)]
+    start, end = span
+    days = (end - start).days + 1
+    shards = max(1, min(shards, days))
+    starts = [start + timedelta(days=days * index // shards) for index in range(shards)]
+    ranges = [(first, following - timedelta(days=1)) for first, following in zip(starts, starts[1:])]
+    ranges.append((starts[-1], end))
+    ranges[0] = (dd.min, ranges[0][1])
+    ranges[-1] = (ranges[-1][0], dd.max)
+    return ranges
+
+
+def read_shard(reader: t.Iterable[t.List[str]], start: dd, end: dd, first: bool) -> t.Iterator[t.List[str]]:
+    """ Function selects rows of the shard. Rows with invalid date are passed to the first shard only, so their
+    errors are reported once.
+
+    :param reader: Rows of the data file without headers.
+    :param start: The first date of the shard.
+    :param end: The last date of the shard.
+    :param first: True for the first shard of the run.
+    :return: Iterator over raw rows of the shard.
+    """
+    for row in reader:
+        try:
+            record_date = parse_date(row[0])
+        except (IndexError, ValueError):
+            if first:
+                yield row
+            continue
+        if start <= record_date <= end:
+            yield row
@@ -0,0 +1,250 @@
+""" Module contains read-only columnar snapshot of covid19 data. Snapshot is published by the ingest as a binary file
+and memory-mapped by every worker, so pages of the file are shared between processes and requests are answered
+without database.
+
+File layout: magic, length of JSON header, JSON header with country index, then native arrays of the rows ordered by
+country and date: dates (int32 ordinals), new cases, new death, total cases and total death (int64).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import typing as t
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date as dd
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy.orm import Session
+
+from root.db import transaction
+from root.settings import DATA_VERSION_CHECK_INTERVAL, SNAPSHOT_PATH
+from scrapping.cache import DATA_VERSION_ID, RESPONSE_CACHE
+from scrapping.models import Covid19, DataVersion, WorldDaily
+
+
+MAGIC = b'CV19'
+HEADER_LENGTH = struct.Struct('<I')
+ALIGNMENT = 8
+COLUMNS = ('new_cases', 'new_death', 'total_cases', 'total_death')
+WORLD = 'World'
+
+Record = t.Dict[str, t.Union[dd, str, int]]
+
+
+def append_row(columns: t.Dict[str, array], row: t.Sequence[t.Any]) -> None:
+    """ Function appends row of the data to the arrays of the snapshot.
+
+    :param columns: Arrays of the snapshot.
+    :param row: Date of the row followed by values in order of `COLUMNS`.
+    """
+    record_date, *numbers = row
+    columns['dates'].append(record_date.toordinal())
+    for column, number in zip(COLUMNS, numbers):
+        columns[column].append(number or 0)
+
+
+def write_snapshot(session: Session, path: Path, version: int) -> None:
+    """ Function writes snapshot of the data and atomically replaces the previous one.
+
+    :param session: Session with committed data.
+    :param path: Path to the snapshot file.
+    :param version: Version of the data.
+    """
+    columns = {'dates': array('i'), **{column: array('q') for column in COLUMNS}}
+    countries: t.Dict[str, t.List[t.Any]] = {}
+
+    rows = session.query(
+        Covid19.countries_iso_alpha_2, Covid19.country_name, Covid19.record_date,
+        Covid19.new_cases, Covid19.new_death, Covid19.total_cases, Covid19.total_death
+    ).order_by(Covid19.countries_iso_alpha_2, Covid19.record_date).yield_per(5000)
+    for country, name, *row in rows:
+        if country not in countries:
+            countries[country] = [name, len(columns['dates']), 0]
+        countries[country][0] = name
+        countries[country][2] += 1
+        append_row(columns, row)
+
+    world_start = len(columns['dates'])
+    for row in session.query(
+            WorldDaily.record_date, WorldDaily.new_cases, WorldDaily.new_death, WorldDaily.total_cases,
+            WorldDaily.total_death
+    ).order_by(WorldDaily.record_date):
+        append_row(columns, row)
+
+    header = json.dumps({
+        'version': version,
+        'byteorder': sys.byteorder,
+        'rows': len(columns['dates']),
+        'countries': countries,
+        'world': [world_start, len(columns['dates']) - world_start],
+    }).encode()
+
+    temporary_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+        for column in columns.values():
+            snapshot_file.write(b'\0' * (-snapshot_file.tell() % ALIGNMENT))
+            snapshot_file.write(column.tobytes())
+    os.replace(temporary_path, path)
+
+
+class Snapshot:
+    """ Memory-mapped snapshot of the data. """
+
+    def __init__(self, path: Path) -> None:
+        with open(path, 'rb') as snapshot_file:
+            self.mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a snapshot file.')
+
+        length, = HEADER_LENGTH.unpack_from(self.mmap, len(MAGIC))
+        offset = len(MAGIC) + HEADER_LENGTH.size
+        header = json.loads(self.mmap[offset:offset + length])
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was written on the platform with another byte order.')
+        self.version: int = header['version']
+        self.countries: t.Dict[str, t.List[t.Any]] = header['countries']
+        self.world: t.List[int] = header['world']
+
+        rows = header['rows']
+        offset += length
+        view = memoryview(self.mmap)  # type: ignore
+        columns = []
+        for item_format in ('i', *('q' for _ in COLUMNS)):
+            offset += -offset % ALIGNMENT
+            size = rows * struct.calcsize(item_format)
+            columns.append(view[offset:offset + size].cast(item_format))
+            offset += size
+        self.dates, *numbers = columns
+        self.values = dict(zip(COLUMNS, numbers))
+
+    def _bounds(self, country: str) -> t.Optional[t.Tuple[str, int, int]]:
+        if country == WORLD:
+            start, count = self.world
+            return WORLD, start, start + count
+        if country not in self.countries:
+            return None
+        name, start, count = self.countries[country]
+        return name, start, start + count
+
+    def by_date(self, country: str, date: dd) -> t.Optional[Record]:
+        """ Method returns data of the country for the date.
+
+        :param country: Country in ISO Alpha-2 format or `WORLD`.
+        :param date: Requested date.
+        :return: Cases and death of the day or None when data is missing.
+        """
+        bounds = self._bounds(country)
+        if bounds is None:
+            return None
+        name, start, end = bounds
+        index = bisect_left(self.dates, date.toordinal(), start, end)
+        if index == end or self.dates[index] != date.toordinal():
+            return None
+        return {
+            'record_date': date,
+            'country_name': name,
+            'new_death': self.values['new_death'][index],
+            'new_cases': self.values['new_cases'][index],
+        }
+
+    def total_to_date(self, country: str, date: dd) -> t.Optional[Record]:
+        """ Method returns running totals of the country on the last known date not after requested one.
+
+        :param country: Country in ISO Alpha-2 format or `WORLD`.
+        :param date: Requested date.
+        :return: Totals of cases and death or None when data is missing.
+        """
+        bounds = self._bounds(country)
+        if bounds is None:
+            return None
+        name, start, end = bounds
+        index = bisect_right(self.dates, date.toordinal(), start, end) - 1
+        if index < start:
+            return None
+        return {
+            'record_date': dd.fromordinal(self.dates[index]),
+            'country_name': name,
+            'new_death': self.values['total_death'][index],
+            'new_cases': self.values['total_cases'][index],
+        }
+
+
+class SnapshotReader:
+    """ Shared reader which reopens snapshot file when it is replaced by the ingest. File is checked not more often
+    than once per check interval.
+    """
+
+    def __init__(self, path: t.Optional[str], check_interval: float) -> None:
+        self.path = Path(path) if path else None
+        self.check_interval = check_interval
+        self._snapshot: t.Optional[Snapshot] = None
+        self._stat: t.Optional[t.Tuple[int, int]] = None
+        self._checked = float('-inf')
+        self._lock = Lock()
+
+    def get(self, version: int) -> t.Optional[Snapshot]:
+        """ Method returns snapshot of the requested data version.
+
+        :param version: Actual version of the data.
+        :return: Snapshot or None when it is disabled, missing or outdated.
+        """
+        if self.path is None:
+            return None
+        with self._lock:
+            if monotonic() - self._checked >= self.check_interval:
+                self._checked = monotonic()
+                self._reopen()
+            snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            return None
+        return snapshot
+
+    def _reopen(self) -> None:
+        try:
+            stat = os.stat(self.path)  # type: ignore
+        except FileNotFoundError:
+            self._snapshot, self._stat = None, None
+            return
+        if (stat.st_ino, stat.st_mtime_ns) != self._stat:
+            self._snapshot = Snapshot(self.path)  # type: ignore
+            self._stat = (stat.st_ino, stat.st_mtime_ns)
+
+
+def publish_snapshot(path: Path) -> bool:
+    """ Function writes snapshot of the current data version unless it is already published.
+
+    :param path: Path to the snapshot file.
+    :return: True when new snapshot was written.
+    """
+    with transaction() as session:
+        version = session.query(DataVersion.version).filter(DataVersion.id == DATA_VERSION_ID).scalar() or 0
+        try:
+            if Snapshot(path).version == version:
+                return False
+        except (OSError, ValueError):
+            pass
+        write_snapshot(session, path, version)
+    return True
+
+
+SNAPSHOT = SnapshotReader(SNAPSHOT_PATH, DATA_VERSION_CHECK_INTERVAL)
+
+
+def current_snapshot() -> t.Optional[Snapshot]:
+    """ Function returns snapshot which matches version of the data served by the worker.
+
+    :return: Snapshot or None when requests should be answered from the database.
+    """
+    return SNAPSHOT.get(RESPONSE_CACHE.version.version)
+
+
+if __name__ == '__main__':
+    if SNAPSHOT_PATH is None:
+        raise SystemExit('SNAPSHOT_PATH is not configured.')
+    publish_snapshot(Path(SNAPSHOT_PATH))
@@ -2,62 +2,394 @@
 
 import typing as t
 import csv
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
 from logging import getLogger, basicConfig, INFO
+from time import monotonic
+from uuid import uuid4
 
+from celery import chord, shared_task
 from celery.task import periodic_task
-from marshmallow import ValidationError
-from sqlalchemy import func
+from sqlalchemy.orm import Session
 
-from root.settings import DATA_FILENAME
-from root.db import transaction
-from scrapping.models import Covid19
-from scrapping.schemas import COVID19_LOAD_SCHEMA
-from scrapping.scrapper import download_csv
+from root.settings import (
+    DATA_FILENAME, INGEST_LOCK_TIMEOUT, INGEST_RUN_TIMEOUT, INGEST_SHARDS, LOCK_POLL_INTERVAL, SNAPSHOT_PATH
+)
+from root.db import single_flight, transaction
+from root.metrics import INGEST_LOCK_WAIT, INGEST_RUNS
+from scrapping.aggregates import refresh_aggregates
+from scrapping.bulk import UpsertReport, clear_shards, merge_shards, stage_shard, upsert_rows
+from scrapping.cache import bump_data_version
+from scrapping.fingerprint import Fingerprint, changed_dates, daily_digests, date_ranges, file_fingerprint
+from scrapping.models import DailyDigest, DataFile
+from scrapping.parser import Covid19Row, parse_chunks
+from scrapping.pipeline import IngestReport, Pipeline, StageReport
+from scrapping.runs import active_runs, finish_run, start_run
+from scrapping.scrapper import download_csv, forget_download
+from scrapping.shards import date_span, read_shard, split_span
+from scrapping.snapshot import publish_snapshot
 
 
 logger = getLogger()
+INGEST_LOCK = 'ingest'
 
 
-@periodic_task(run_every=timedelta(hours=1))
-def store_csv_data() -> None:
-    """ Function launches downloading of the file with data from the source. When we have some data in our base,
-    function will update data for the last two days or if data not exist function will load all the data from the
-    source.
+def read_rows(reader: t.Iterator[t.List[str]]) -> t.Iterator[Covid19Row]:
+    """ Function validates rows of the data file and yields valid ones.
+
+    :param reader: Rows of the data file without headers.
+    :return: Iterator over validated rows.
+    """
+    for chunk in parse_chunks(reader):
+        for index, messages in chunk.errors:
+            logger.warning('Error during loading of {} line: {}', index + 1, messages)
+        yield from chunk.rows
+
+
+def is_ingested(session: Session, fingerprint: Fingerprint) -> bool:
+    """ Function checks if the file with the same fingerprint was the last ingested one.
+
+    :param session: Session of the ingest.
+    :param fingerprint: Fingerprint of the downloaded file.
+    :return: True when the file is already ingested.
+    """
+    last_file = session.query(DataFile).order_by(DataFile.id.desc()).first()
+    return last_file is not None and Fingerprint(last_file.sha256, last_file.size) == fingerprint
+
+
+def store_digests(session: Session, digests: t.Dict[date, str], changed: t.Set[date]) -> None:
+    """ Function saves digests of the changed days.
+
+    :param session: Session of the ingest.
+    :param digests: Digests of the ingested file.
+    :param changed: Days which were changed by the ingest.
     """
-    logger.info('Downloading data file...')
-    csv_path = download_csv(DATA_FILENAME)
+    session.query(DailyDigest).filter(DailyDigest.record_date.in_(changed)).delete(synchronize_session=False)
+    session.add_all(
+        DailyDigest(record_date=record_date, digest=digests[record_date])
+        for record_date in changed if record_date in digests
+    )
+
+
+def log_upsert(report: UpsertReport) -> None:
+    """ Function logs counts of the merged rows. """
+    logger.info(
+        'Merged {} inserted, {} updated and {} deleted records, {} records are unchanged...',
+        report.inserted, report.updated, report.deleted, report.unchanged
+    )
+
+
+def commit_ingest(
+        session: Session,
+        pipeline: Pipeline,
+        fingerprint: Fingerprint,
+        digests: t.Dict[date, str],
+        changed: t.Set[date],
+        last_date: t.Optional[date]
+) -> None:
+    """ Function refreshes aggregates of the merged days and commits the ingest with the new version of data.
+
+    :param session: Session of the ingest with merged rows.
+    :param pipeline: Recorder of the stages of the run.
+    :param fingerprint: Fingerprint of the ingested file.
+    :param digests: Digests of the changed days of the ingested file.
+    :param changed: Days which were changed by the ingest.
+    :param last_date: The last date of the ingested file.
+    """
+    if changed:
+        logger.info('Updating aggregates...')
+        with pipeline.stage('aggregates'):
+            refresh_aggregates(session, min(changed))
+
+    with pipeline.stage('commit'):
+        if changed:
+            store_digests(session, digests, changed)
+            bump_data_version(session)
+        session.add(DataFile(sha256=fingerprint.sha256, size=fingerprint.size, last_date=last_date))
+        session.commit()
+
+
+def publish(pipeline: Pipeline) -> None:
+    """ Function publishes snapshot of the committed data when `SNAPSHOT_PATH` is configured.
+
+    :param pipeline: Recorder of the stages of the run.
+    """
+    if SNAPSHOT_PATH is None:
+        return
+    with pipeline.stage('snapshot'):
+        if publish_snapshot(Path(SNAPSHOT_PATH)):
+            logger.info('Snapshot of the data was published to {}.', SNAPSHOT_PATH)
+
+
+def ingest_csv(csv_path: Path, pipeline: t.Optional[Pipeline] = None) -> IngestReport:
+    """ Function ingests downloaded data file. Function skips the file which is the same as the last ingested one,
+    otherwise it compares digests of every day with the ingested data and merges only the days which were added,
+    changed or removed by the source. Only changed rows are written.
+
+    :param csv_path: Path to the downloaded data file.
+    :param pipeline: Recorder of the stages of the run.
+    :return: Report of the run.
+    """
+    pipeline = pipeline or Pipeline()
+    with pipeline.stage('fingerprint'):
+        fingerprint = file_fingerprint(csv_path)
+
     with transaction() as session, open(csv_path) as covidcsv:
+        if is_ingested(session, fingerprint):
+            logger.info('Data file was not changed since the last ingest.')
+            return pipeline.report('unchanged')
+
         logger.info('Parsing data file...')
+        with pipeline.stage('parse') as counter:
+            reader = csv.reader(covidcsv)
+            next(reader)  # skip table headers
+            rows = list(read_rows(reader))
+            counter.rows = len(rows)
+
+        with pipeline.stage('dedupe') as counter:
+            digests = daily_digests(rows)
+            changed = changed_dates(digests, dict(session.query(DailyDigest.record_date, DailyDigest.digest)))
+            counter.rows = len(rows)
+        logger.info('Data was changed for {} days.', len(changed))
+
+        report = None
+        if changed:
+            ranges = date_ranges(changed)
+            logger.info('Merging data for the changed days: {}', ranges)
+            with pipeline.stage('merge') as counter:
+                report = upsert_rows(session, (row for row in rows if row.record_date in changed), ranges)
+                counter.rows = report.inserted + report.updated + report.unchanged
+            log_upsert(report)
+
+        commit_ingest(session, pipeline, fingerprint, digests, changed, max(digests, default=None))
+    return pipeline.report('ingested', len(changed), report)
+
+
+def read_shard_rows(covidcsv: t.TextIO, start: date, end: date, index: int) -> t.List[Covid19Row]:
+    """ Function validates rows of the date range of the data file.
+
+    :param covidcsv: Opened data file.
+    :param start: The first date of the shard.
+    :param end: The last date of the shard.
+    :param index: Number of the shard, rows with invalid date are validated by the first shard.
+    :return: Validated rows of the shard.
+    """
+    reader = csv.reader(covidcsv)
+    next(reader)  # skip table headers
+    rows = []
+    for chunk in parse_chunks(read_shard(reader, start, end, index == 0)):
+        for line, messages in chunk.errors:
+            logger.warning('Error during loading of {} row of shard {}: {}', line + 1, index, messages)
+        rows.extend(chunk.rows)
+    return rows
+
+
+@shared_task
+def ingest_shard(run_id: str, csv_path: str, start: str, end: str, index: int) -> t.Dict[str, t.Any]:
+    """ Task validates rows of the date range of the data file and stages rows of its changed days.
+
+    :param run_id: Identifier of the ingest run.
+    :param csv_path: Path to the data file, it should be accessible by all the workers.
+    :param start: The first date of the shard in ISO format.
+    :param end: The last date of the shard in ISO format.
+    :param index: Number of the shard.
+    :return: Digests of the changed days, the last date of the shard and measurements of its stages.
+    """
+    pipeline = Pipeline()
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    with transaction() as session, open(csv_path) as covidcsv:
+        with pipeline.stage(f'parse:{index}') as counter:
+            rows = read_shard_rows(covidcsv, first, last, index)
+            counter.rows = len(rows)
+
+        with pipeline.stage(f'dedupe:{index}') as counter:
+            digests = daily_digests(rows)
+            stored = session.query(DailyDigest.record_date, DailyDigest.digest).filter(
+                DailyDigest.record_date.between(first, last)
+            )
+            changed = changed_dates(digests, dict(stored))
+            counter.rows = len(rows)
+
+        with pipeline.stage(f'stage:{index}') as counter:
+            counter.rows = stage_shard(session, run_id, (row for row in rows if row.record_date in changed))
+            session.commit()
+
+    return {
+        'digests': {day.isoformat(): digests.get(day) for day in changed},
+        'last_date': max(digests).isoformat() if digests else None,
+        'stages': pipeline.stages,
+    }
+
+
+@contextmanager
+def ingest_lock(timeout: float) -> t.Iterator[bool]:
+    """ Context manager which holds single-flight lock of the ingest and measures waiting for it.
+
+    :param timeout: Seconds of waiting for the running ingest.
+    :return: True when the lock is acquired.
+    """
+    started = monotonic()
+    with single_flight(INGEST_LOCK, timeout) as acquired:
+        waited = monotonic() - started
+        INGEST_LOCK_WAIT.observe(waited)
+        if waited >= LOCK_POLL_INTERVAL:
+            logger.info('Ingest lock was waited for {:.3f} s.', waited)
+        yield acquired
+
+
+@shared_task
+def finish_sharded_ingest(
+        results: t.List[t.Dict[str, t.Any]], run_id: str, sha256: str, size: int
+) -> IngestReport:
+    """ Task merges rows staged by all the shards of the run, refreshes aggregates and commits the ingest with the new
+    version of data in one transaction.
+
+    :param results: Results of the shards.
+    :param run_id: Identifier of the ingest run.
+    :param sha256: Hash of the ingested file.
+    :param size: Size of the ingested file.
+    :return: Report of the run with measurements of the stages of all the shards.
+    """
+    pipeline = Pipeline()
+    digests: t.Dict[date, t.Optional[str]] = {}
+    last_date = None
+    for result in results:
+        pipeline.stages.extend(StageReport(*stage) for stage in result['stages'])
+        digests.update((date.fromisoformat(day), digest) for day, digest in result['digests'].items())
+        if result['last_date'] is not None:
+            last_date = max(last_date or date.min, date.fromisoformat(result['last_date']))
+    logger.info('Data was changed for {} days.', len(digests))
+
+    upsert = None
+    with ingest_lock(INGEST_RUN_TIMEOUT) as acquired, transaction() as session:
+        if not acquired:
+            raise TimeoutError(f'Ingest lock was not acquired by the last task of the run {run_id}.')
+        if digests:
+            ranges = date_ranges(digests)
+            logger.info('Merging staged data for the changed days: {}', ranges)
+            with pipeline.stage('merge') as counter:
+                upsert = merge_shards(session, run_id, ranges)
+                counter.rows = upsert.inserted + upsert.updated + upsert.unchanged
+            log_upsert(upsert)
+
+        clear_shards(session, run_id)
+        commit_ingest(
+            session, pipeline, Fingerprint(sha256, size),
+            {day: digest for day, digest in digests.items() if digest is not None}, set(digests), last_date
+        )
+    finish_run(run_id)
+
+    publish(pipeline)
+    report = pipeline.report('ingested', len(digests), upsert)
+    logger.info('Sharded ingest run {} is finished in {:.3f} s.', run_id, report.seconds)
+    return report
+
+
+@shared_task
+def abandon_sharded_ingest(run_id: str) -> None:
+    """ Task cleans up the failed sharded run. Validators of the download are forgotten, so the file is ingested again
+    by the next run.
+
+    :param run_id: Identifier of the ingest run.
+    """
+    logger.error('Sharded ingest run {} failed.', run_id)
+    with transaction() as session:
+        clear_shards(session, run_id)
+    finish_run(run_id)
+    forget_download(DATA_FILENAME)
+
+
+def dispatch_shards(run_id: str, csv_path: Path, pipeline: Pipeline, shards: int) -> IngestReport:
+    """ Function splits the data file into date ranges and fans them out to the workers. The last task of the run
+    commits all the shards at once, so the new version of data is published atomically.
+
+    :param run_id: Identifier of the ingest run.
+    :param csv_path: Path to the downloaded data file in the directory of the run.
+    :param pipeline: Recorder of the stages of the run.
+    :param shards: Maximum number of shards.
+    :return: Report of the dispatched run.
+    """
+    with pipeline.stage('fingerprint'):
+        fingerprint = file_fingerprint(csv_path)
+    with transaction() as session:
+        if is_ingested(session, fingerprint):
+            logger.info('Data file was not changed since the last ingest.')
+            return pipeline.report('unchanged')
+        clear_shards(session, staged_before=datetime.utcnow() - timedelta(seconds=INGEST_RUN_TIMEOUT))
+
+    with pipeline.stage('split'), open(csv_path) as covidcsv:
         reader = csv.reader(covidcsv)
         next(reader)  # skip table headers
-        covid19_buffer: t.List[Covid19] = []
-
-        data_exists = bool(session.query(Covid19).count())
-        if data_exists:
-            logger.info('Cleaning data for the last two days...')
-            yesterday = (datetime.now() - timedelta(days=1)).date()
-            session.query(Covid19).filter(Covid19.record_date >= yesterday).delete()
-
-        max_date = session.query(func.max(Covid19.record_date).label('date')).one()
-
-        for index, row in enumerate(reader):  # type: t.Tuple[int, t.List[str]]
-            try:
-                record = COVID19_LOAD_SCHEMA.load({
-                    'record_date': row[0],
-                    'countries_iso_alpha_2': row[1],
-                    'country_name': row[2],
-                    'new_cases': row[4],
-                    'new_death': row[6],
-                })
-            except ValidationError as err:
-                logger.warning('Error during loading of {} line: {}', index + 1, err.messages)
-                continue
-            if data_exists and record.record_date <= max_date.date:
-                continue
-            covid19_buffer.append(record)
-        logger.info('Commit of {} records...', len(covid19_buffer))
-        session.add_all(covid19_buffer)
+        ranges = split_span(date_span(reader), shards)
+
+    logger.info('Dispatching ingest run {} in {} shards...', run_id, len(ranges))
+    chord(
+        ingest_shard.s(run_id, str(csv_path), start.isoformat(), end.isoformat(), index)
+        for index, (start, end) in enumerate(ranges)
+    )(finish_sharded_ingest.s(run_id, fingerprint.sha256, fingerprint.size).on_error(
+        abandon_sharded_ingest.si(run_id)
+    ))
+    return pipeline.report('dispatched')
+
+
+def run_ingest(pipeline: Pipeline) -> IngestReport:
+    """ Function downloads data file into the directory of the run and ingests it. Directory of the sharded run is
+    removed by its last task.
+
+    :param pipeline: Recorder of the stages of the run.
+    :return: Report of the run.
+    """
+    run_id = uuid4().hex
+    directory = start_run(run_id)
+    report = None
+    try:
+        logger.info('Downloading data file...')
+        with pipeline.stage('download'):
+            csv_path = download_csv(DATA_FILENAME, directory)
+        if csv_path is None:
+            logger.info('Data file was not modified since the last download.')
+            report = pipeline.report('not_modified')
+        elif INGEST_SHARDS > 1:
+            report = dispatch_shards(run_id, csv_path, pipeline, INGEST_SHARDS)
+        else:
+            report = ingest_csv(csv_path, pipeline)
+    except Exception:
+        forget_download(DATA_FILENAME)
+        raise
+    finally:
+        if report is None or report.status != 'dispatched':
+            finish_run(run_id)
+    return report
+
+
+@periodic_task(run_every=timedelta(hours=1))
+def store_csv_data() -> IngestReport:
+    """ Function launches downloading of the file with data from the source and ingests it. Only one run is in flight:
+    the scheduled run is skipped when the previous one holds the lock longer than `INGEST_LOCK_TIMEOUT` or its shards
+    are still running. When `INGEST_SHARDS` is greater than one, the file is ingested by parallel shards and the run
+    finishes in the last task of the shards. When `SNAPSHOT_PATH` is configured, snapshot of the committed data is
+    published for the workers of the web application.
+
+    :return: Report of the run with measurements of every stage.
+    """
+    pipeline = Pipeline()
+    with ingest_lock(INGEST_LOCK_TIMEOUT) as acquired:
+        in_flight = active_runs() if acquired else []
+        if not acquired or in_flight:
+            INGEST_RUNS.labels('skipped').inc()
+            logger.warning('Ingest run is skipped, because the previous run {} is in flight.', ', '.join(in_flight))
+            return pipeline.report('skipped')
+        INGEST_RUNS.labels('started').inc()
+
+        report = run_ingest(pipeline)
+        if report.status == 'dispatched':
+            return report
+        publish(pipeline)
+
+    report = report._replace(stages=list(pipeline.stages))
+    logger.info('Ingest run is finished with status {} in {:.3f} s.', report.status, report.seconds)
+    return report
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+from datetime import date
+
+from root.utils import DBTestCase
+from root.db import connection
+from scrapping.aggregates import refresh_aggregates, refresh_country_totals
+from scrapping.models import Covid19, WorldDaily
+
+
+class CountryTotalsTests(DBTestCase):
+
+    def setUp(self) -> None:
+        with connection() as session:
+            session.query(Covid19).delete()
+            session.add_all([
+                Covid19(
+                    record_date=date(2020, 5, day),
+                    countries_iso_alpha_2=country,
+                    country_name=country,
+                    new_death=day,
+                    new_cases=day * 10
+                )
+                for day in (26, 27, 28)
+                for country in ('UA', 'US')
+            ])
+            refresh_country_totals(session)
+
+    def get_totals(self, country: str):
+        with connection() as session:
+            return [
+                (record.record_date.day, record.total_cases, record.total_death)
+                for record in session.query(Covid19).filter(
+                    Covid19.countries_iso_alpha_2 == country
+                ).order_by(Covid19.record_date)
+            ]
+
+    def test_full_refresh(self):
+        expect = [(26, 260, 26), (27, 530, 53), (28, 810, 81)]
+        self.assertListEqual(self.get_totals('UA'), expect, msg='Unexpected running totals.')
+        self.assertListEqual(self.get_totals('US'), expect, msg='Unexpected running totals.')
+
+    def test_incremental_refresh(self):
+        with connection() as session:
+            session.query(Covid19).filter(
+                Covid19.countries_iso_alpha_2 == 'UA',
+                Covid19.record_date == date(2020, 5, 27)
+            ).update({'new_cases': 0, 'new_death': 0})
+            session.add(Covid19(
+                record_date=date(2020, 5, 29),
+                countries_iso_alpha_2='UA',
+                country_name='UA',
+                new_death=1,
+                new_cases=10
+            ))
+            refresh_country_totals(session, date(2020, 5, 27))
+
+        expect = [(26, 260, 26), (27, 260, 26), (28, 540, 54), (29, 550, 55)]
+        self.assertListEqual(self.get_totals('UA'), expect, msg='Unexpected running totals.')
+        expect = [(26, 260, 26), (27, 530, 53), (28, 810, 81)]
+        self.assertListEqual(self.get_totals('US'), expect, msg='Untouched country totals were changed.')
+
+
+class WorldDailyTests(DBTestCase):
+
+    def setUp(self) -> None:
+        with connection() as session:
+            session.query(Covid19).delete()
+            session.query(WorldDaily).delete()
+            session.add_all([
+                Covid19(
+                    record_date=date(2020, 5, day),
+                    countries_iso_alpha_2=country,
+                    country_name=country,
+                    new_death=day,
+                    new_cases=day * 10
+                )
+                for day in (26, 27, 28)
+                for country in ('UA', 'US')
+            ])
+            refresh_aggregates(session)
+
+    def get_rollups(self):
+        with connection() as session:
+            return [
+                (rollup.record_date.day, rollup.new_cases, rollup.total_cases, rollup.total_death)
+                for rollup in session.query(WorldDaily).order_by(WorldDaily.record_date)
+            ]
+
+    def test_full_refresh(self):
+        expect = [(26, 520, 520, 52), (27, 540, 1060, 106), (28, 560, 1620, 162)]
+        self.assertListEqual(self.get_rollups(), expect, msg='Unexpected World rollup.')
+
+    def test_incremental_refresh(self):
+        with connection() as session:
+            session.query(Covid19).filter(Covid19.record_date == date(2020, 5, 28)).delete()
+            session.query(Covid19).filter(
+                Covid19.countries_iso_alpha_2 == 'UA',
+                Covid19.record_date == date(2020, 5, 27)
+            ).update({'new_cases': 0, 'new_death': 0})
+            refresh_aggregates(session, date(2020, 5, 27))
+
+        expect = [(26, 520, 520, 52), (27, 270, 790, 79)]
+        self.assertListEqual(self.get_rollups(), expect, msg='Unexpected World rollup.')
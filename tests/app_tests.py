@@ -1,3 +1,4 @@
+import json
 import typing as t
 from datetime import date
 
@@ -6,6 +7,7 @@ from flask import Response
 
 from root.utils import DBTestCase
 from root.db import connection
+from scrapping.aggregates import refresh_aggregates, refresh_country_totals
 from scrapping.models import Covid19
 from app import app
 
@@ -99,6 +101,7 @@ class CountryTotalTests(DBTestCase):
                     new_cases=50
                 )
             ])
+            refresh_country_totals(session)
 
     def test_total_to_date_by_country_controller(self):
         response = self.client.get('/UA?date=2020-05-27')
@@ -167,6 +170,7 @@ class WorldTotalTests(DBTestCase):
                     new_cases=200
                 )
             ])
+            refresh_aggregates(session)
 
     def test_world_total_to_date_controller(self):
         response = self.client.get('/world?date=2020-05-27')
@@ -231,6 +235,7 @@ class WorldTotalByDateTests(DBTestCase):
                     new_cases=200
                 )
             ])
+            refresh_aggregates(session)
 
     def test_world_total_by_date_controller(self):
         response = self.client.get('/world/2020-05-27')
@@ -250,3 +255,118 @@ class WorldTotalByDateTests(DBTestCase):
     def test_no_result_found(self):
         response = self.client.get('/world/2020-05-29')
         self.assertEquals(response.status_code, 404, msg='Unexpected data exists.')
+
+
+class BatchTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add_all([
+                Covid19(
+                    record_date=date(2020, 5, 27),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=10,
+                    new_cases=100
+                ),
+                Covid19(
+                    record_date=date(2020, 5, 27),
+                    countries_iso_alpha_2='US',
+                    country_name='United States of America',
+                    new_death=20,
+                    new_cases=200
+                ),
+                Covid19(
+                    record_date=date(2020, 5, 28),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=5,
+                    new_cases=50
+                )
+            ])
+
+    def test_batch_items(self):
+        response = self.client.post('/batch', json={'items': [
+            {'country': 'ua', 'date': '2020-05-28'},
+            {'country': 'PL', 'date': '2020-05-27'},
+            {'country': 'US', 'date': '2020-05-27'},
+        ]})
+        expect = {'items': [
+            {'cases': 50, 'country': 'Ukraine', 'date': '2020-05-28', 'death': 5},
+            {'country': 'PL', 'date': '2020-05-27', 'message': 'Not Found'},
+            {'cases': 200, 'country': 'United States of America', 'date': '2020-05-27', 'death': 20},
+        ]}
+        self.assertEquals(response.status_code, 200, msg='Unexpected status code.')
+        self.assertDictEqual(response.json, expect, msg='Unexpected data.')
+
+    def test_batch_countries(self):
+        response = self.client.post('/batch', json={'countries': ['UA', 'US'], 'date': '2020-05-27'})
+        expect = {'items': [
+            {'cases': 100, 'country': 'Ukraine', 'date': '2020-05-27', 'death': 10},
+            {'cases': 200, 'country': 'United States of America', 'date': '2020-05-27', 'death': 20},
+        ]}
+        self.assertEquals(response.status_code, 200, msg='Unexpected status code.')
+        self.assertDictEqual(response.json, expect, msg='Unexpected data.')
+
+    def test_bad_request(self):
+        for body in (
+                {},
+                {'countries': ['UA']},
+                {'items': []},
+                {'items': [{'country': 'UA', 'date': '20200527'}]},
+                {'items': [{'country': 'UA', 'date': '2020-05-27'}], 'countries': ['UA'], 'date': '2020-05-27'},
+        ):
+            with self.subTest(body=body):
+                response = self.client.post('/batch', json=body)
+                self.assertEquals(response.status_code, 422, msg='Wrong request. Success validation.')
+
+
+class CountrySeriesTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add_all([
+                Covid19(
+                    record_date=date(2020, 5, day),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=day,
+                    new_cases=day * 10
+                )
+                for day in range(1, 31)
+            ])
+
+    def test_ndjson_series(self):
+        response = self.client.get('/ua/series?from=2020-05-27&to=2020-05-28')
+        self.assertEquals(response.status_code, 200, msg='Unexpected status code.')
+        self.assertEquals(response.content_type, 'application/x-ndjson')
+        self.assertListEqual([json.loads(line) for line in response.data.splitlines()], [
+            {'cases': 270, 'country': 'Ukraine', 'date': '2020-05-27', 'death': 27},
+            {'cases': 280, 'country': 'Ukraine', 'date': '2020-05-28', 'death': 28},
+        ], msg='Unexpected data.')
+
+    def test_json_series(self):
+        response = self.client.get('/UA/series?from=2020-05-29&format=json')
+        self.assertEquals(response.status_code, 200, msg='Unexpected status code.')
+        self.assertListEqual(response.json, [
+            {'cases': 290, 'country': 'Ukraine', 'date': '2020-05-29', 'death': 29},
+            {'cases': 300, 'country': 'Ukraine', 'date': '2020-05-30', 'death': 30},
+        ], msg='Unexpected data.')
+
+    def test_full_series(self):
+        response = self.client.get('/UA/series')
+        self.assertEquals(len(response.data.splitlines()), 30, msg='Unexpected number of days.')
+
+    def test_no_result_found(self):
+        response = self.client.get('/UA/series?to=2020-04-30')
+        self.assertEquals(response.status_code, 404, msg='Unexpected data exists.')
+
+    def test_bad_arguments(self):
+        for query in ('from=20200527', 'format=xml', 'from=2020-05-28&to=2020-05-27'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/UA/series?{query}')
+                self.assertEquals(response.status_code, 422, msg='Wrong arguments. Success validation.')
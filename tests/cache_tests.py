@@ -0,0 +1,149 @@
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+from root.cache import LRUCache, VersionedCache
+from root.db import connection
+from root.utils import DBTestCase
+from scrapping.aggregates import refresh_aggregates
+from scrapping.cache import RESPONSE_CACHE, bump_data_version, get_data_version
+from scrapping.models import Covid19
+from app import app
+
+
+class LRUCacheTests(TestCase):
+
+    def test_eviction(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('b'), msg='Least recently used entry was not evicted.')
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertDictEqual(cache.stats(), {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1})
+
+    def test_ttl(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        with patch('root.cache.monotonic', return_value=float('inf')):
+            self.assertIsNone(cache.get('a'), msg='Expired entry was returned.')
+        self.assertEqual(len(cache), 0, msg='Expired entry was not removed.')
+
+    def test_version(self):
+        versions = iter([1, 1, 2])
+        cache = VersionedCache(max_size=2, ttl=60, get_version=lambda: next(versions), check_interval=0)
+        self.assertEqual(cache.version, 1)
+        cache.set('a', 1)
+        self.assertEqual(cache.version, 1)
+        self.assertEqual(cache.get('a'), 1, msg='Entry was invalidated without version change.')
+        self.assertEqual(cache.version, 2)
+        self.assertIsNone(cache.get('a'), msg='Entry was not invalidated by version change.')
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+
+class ResponseCacheTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add(
+                Covid19(
+                    record_date=date(2020, 5, 27),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=10,
+                    new_cases=100
+                )
+            )
+
+    def update_cases(self, cases: int) -> None:
+        with connection() as session:
+            session.query(Covid19).update({'new_cases': cases})
+            bump_data_version(session)
+
+    def test_cached_until_new_version(self):
+        response = self.client.get('/UA/2020-05-27')
+        self.assertEqual(response.json['cases'], 100, msg='Unexpected data.')
+
+        self.update_cases(200)
+        hits = RESPONSE_CACHE.hits
+        response = self.client.get('/UA/2020-05-27')
+        self.assertEqual(response.json['cases'], 100, msg='Response was not cached.')
+        self.assertEqual(RESPONSE_CACHE.hits, hits + 1, msg='Cache hit was not counted.')
+
+        with patch.object(RESPONSE_CACHE, 'check_interval', 0):
+            response = self.client.get('/UA/2020-05-27')
+        self.assertEqual(response.json['cases'], 200, msg='Cache was not invalidated by new data version.')
+
+    def test_errors_are_not_cached(self):
+        misses = RESPONSE_CACHE.misses
+        self.client.get('/UA/2020-05-28')
+        self.client.get('/UA/2020-05-28')
+        self.assertEqual(RESPONSE_CACHE.misses, misses + 2, msg='Error response was cached.')
+
+    def test_bump_data_version(self):
+        with connection() as session:
+            version = get_data_version().version
+            bump_data_version(session)
+        self.assertEqual(get_data_version().version, version + 1, msg='Data version was not increased.')
+
+
+class ConditionalResponseTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add(
+                Covid19(
+                    record_date=date(2020, 5, 27),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=10,
+                    new_cases=100
+                )
+            )
+            refresh_aggregates(session)
+            bump_data_version(session)
+
+    def setUp(self) -> None:
+        RESPONSE_CACHE.clear()
+
+    def test_etag(self):
+        response = self.client.get('/UA/2020-05-27')
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache', msg='Unexpected cache control.')
+
+        with patch('scrapping.controllers.read_session') as db_session:
+            response = self.client.get('/UA/2020-05-27', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304, msg='Actual response was sent again.')
+        self.assertEqual(response.data, b'', msg='Not modified response has body.')
+        self.assertEqual(response.headers['ETag'], etag, msg='Unexpected ETag.')
+        db_session.query.assert_not_called()
+
+        response = self.client.get('/UA', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200, msg='ETag of another request was accepted.')
+
+    def test_etag_of_new_version(self):
+        etag = self.client.get('/UA/2020-05-27').headers['ETag']
+        with connection() as session:
+            bump_data_version(session)
+
+        with patch.object(RESPONSE_CACHE, 'check_interval', 0):
+            response = self.client.get('/UA/2020-05-27', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200, msg='Outdated ETag was accepted.')
+        self.assertNotEqual(response.headers['ETag'], etag, msg='ETag was not changed by new data version.')
+
+    def test_last_modified(self):
+        response = self.client.get('/world/2020-05-27')
+        last_modified = response.headers['Last-Modified']
+
+        response = self.client.get('/world/2020-05-27', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304, msg='Actual response was sent again.')
+
+        response = self.client.get('/world/2020-05-27', headers={'If-Modified-Since': 'Mon, 01 Jun 2020 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200, msg='Outdated response was not updated.')
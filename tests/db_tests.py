@@ -0,0 +1,48 @@
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from root.db import BaseModel, create_read_session, db, engine_options
+from scrapping.models import Covid19
+
+
+class EngineOptionsTests(TestCase):
+
+    def test_sqlite(self):
+        self.assertDictEqual(engine_options('sqlite://'), {}, msg='Pool options were passed to SQLite.')
+
+    def test_postgres(self):
+        with patch('root.db.DB_POOL_SIZE', 7), patch('root.db.DB_STATEMENT_TIMEOUT', 0):
+            options = engine_options('postgres://postgres@postgres:5432/covid19')
+        self.assertEqual(options['pool_size'], 7, msg='Unexpected pool size.')
+        self.assertNotIn('connect_args', options, msg='Disabled statement timeout was set.')
+
+        with patch('root.db.DB_STATEMENT_TIMEOUT', 5000):
+            options = engine_options('postgres://postgres@postgres:5432/covid19')
+        self.assertEqual(options['connect_args'], {'options': '-c statement_timeout=5000'})
+
+
+class ReadSessionTests(TestCase):
+
+    def test_primary(self):
+        with patch('root.db.DATABASE_REPLICA_URL', None):
+            self.assertIs(create_read_session(), db.session, msg='Reads were not sent to primary database.')
+
+    def test_replica(self):
+        with TemporaryDirectory() as directory:
+            replica_url = f'sqlite:///{Path(directory) / "replica.db"}'
+            with patch('root.db.DATABASE_REPLICA_URL', replica_url):
+                read_session = create_read_session()
+                engine = read_session.get_bind()
+                BaseModel.metadata.create_all(engine, tables=[Covid19.__table__])
+                engine.execute(Covid19.__table__.insert().values(
+                    record_date=date(2020, 5, 27), countries_iso_alpha_2='ZZ', country_name='Replica',
+                    new_death=1, new_cases=1
+                ))
+
+                record = read_session.query(Covid19).filter(Covid19.countries_iso_alpha_2 == 'ZZ').one()
+                self.assertEqual(record.country_name, 'Replica', msg='Reads were not sent to replica.')
+                read_session.remove()
+                engine.dispose()
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from datetime import date
+from tempfile import TemporaryDirectory
+
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+from root.db import connection
+from root.metrics import observe_stage
+from root.utils import DBTestCase
+from scrapping.cache import RESPONSE_CACHE
+from scrapping.models import Covid19
+from app import app
+
+
+class MetricsTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add(
+                Covid19(
+                    record_date=date(2020, 5, 27),
+                    countries_iso_alpha_2='UA',
+                    country_name='Ukraine',
+                    new_death=10,
+                    new_cases=100
+                )
+            )
+
+    @staticmethod
+    def sample(name: str, **labels: str) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests(self):
+        labels = {'endpoint': 'scrapping.country_by_date', 'method': 'GET'}
+        requests = self.sample('http_requests_total', status='200', **labels)
+        not_found = self.sample('http_requests_total', status='404', **labels)
+        observed = self.sample('http_request_duration_seconds_count', **labels)
+        queries = self.sample('db_query_duration_seconds_count', operation='SELECT')
+
+        RESPONSE_CACHE.clear()
+        self.client.get('/UA/2020-05-27')
+        self.client.get('/UA/2020-05-28')
+
+        self.assertEqual(self.sample('http_requests_total', status='200', **labels), requests + 1)
+        self.assertEqual(self.sample('http_requests_total', status='404', **labels), not_found + 1)
+        self.assertEqual(self.sample('http_request_duration_seconds_count', **labels), observed + 2)
+        self.assertGreater(
+            self.sample('db_query_duration_seconds_count', operation='SELECT'), queries, msg='Queries were not timed.'
+        )
+
+    def test_cache(self):
+        RESPONSE_CACHE.clear()
+        hits = self.sample('cache_requests_total', cache='responses', result='hit')
+        self.client.get('/UA/2020-05-27')
+        self.client.get('/UA/2020-05-27')
+        self.assertEqual(self.sample('cache_requests_total', cache='responses', result='hit'), hits + 1)
+
+    def test_ingest_stage(self):
+        count = self.sample('ingest_stage_duration_seconds_count', stage='parse')
+        with observe_stage('parse'):
+            pass
+        self.assertEqual(self.sample('ingest_stage_duration_seconds_count', stage='parse'), count + 1)
+
+    def test_endpoint(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200, msg='Unexpected status code.')
+        self.assertIn(b'http_request_duration_seconds_bucket', response.data, msg='Latency histogram is missing.')
+
+
+class MultiprocessMetricsTests(DBTestCase):
+
+    def test_aggregation(self):
+        with TemporaryDirectory() as directory:
+            env = {**os.environ, 'prometheus_multiproc_dir': directory, 'DB_URL': 'sqlite://'}
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, '-c', 'from app import app; app.test_client().get("/")'], env=env, check=True
+                )
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=directory)
+            requests = registry.get_sample_value(
+                'http_requests_total', {'endpoint': 'index', 'method': 'GET', 'status': '200'}
+            )
+        self.assertEqual(requests, 2, msg='Metrics of processes were not aggregated.')
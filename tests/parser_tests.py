@@ -0,0 +1,57 @@
+from datetime import date
+from unittest import TestCase
+
+from marshmallow import ValidationError
+
+from scrapping.parser import Covid19Row, parse_chunks, parse_row
+from scrapping.schemas import COVID19_LOAD_SCHEMA
+
+ROWS = [
+    ['2020-05-27T00:00:00Z', 'UA', 'Ukraine', 'EURO', '100', '100', '10', '10'],
+    ['2020-05-27', 'XK', '', 'EURO', ' 7 ', '7', '0', '0'],
+    ['2020-5-7', 'US', 'United States of America', 'AMRO', '1', '1', '-1', '0'],
+    ['2020-13-27', 'UA', 'Ukraine', 'EURO', '1', '1', '1', '1'],
+    ['', 'UA', 'Ukraine', 'EURO', '1', '1', '1', '1'],
+    ['27.05.2020', 'UA', 'Ukraine', 'EURO', '1.5', '1', 'n/a', '1'],
+    ['2020-05-27', 'UA', 'Ukraine', 'EURO', '', '1', '1', '1'],
+]
+
+
+def load_with_schema(row):
+    try:
+        record = COVID19_LOAD_SCHEMA.load({
+            'record_date': row[0],
+            'countries_iso_alpha_2': row[1],
+            'country_name': row[2],
+            'new_cases': row[4],
+            'new_death': row[6],
+        })
+    except ValidationError as err:
+        return err.messages
+    return Covid19Row(
+        record.record_date, record.countries_iso_alpha_2, record.country_name, record.new_death, record.new_cases
+    )
+
+
+class ParserTests(TestCase):
+
+    def test_schema_parity(self):
+        for row in ROWS:
+            with self.subTest(row=row):
+                self.assertEqual(parse_row(row), load_with_schema(row), msg='Parser differs from the schema.')
+
+    def test_normalization(self):
+        self.assertEqual(
+            parse_row(ROWS[1]),
+            Covid19Row(date(2020, 5, 27), 'XK', 'XK', 0, 7),
+            msg='Unexpected normalization.'
+        )
+
+    def test_chunks(self):
+        chunks = list(parse_chunks(ROWS, chunk_size=3))
+        self.assertListEqual([len(chunk.rows) for chunk in chunks], [3, 0, 0], msg='Unexpected chunks.')
+        self.assertListEqual(
+            [index for chunk in chunks for index, _messages in chunk.errors],
+            [3, 4, 5, 6],
+            msg='Unexpected indexes of invalid rows.'
+        )
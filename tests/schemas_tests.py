@@ -0,0 +1,41 @@
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+from scrapping.models import Covid19
+from scrapping.schemas import BatchResultSchema, Covid19Schema
+
+
+class FastDumpTests(TestCase):
+
+    def setUp(self) -> None:
+        self.record = Covid19(record_date=date(2020, 5, 27), country_name='Ukraine', new_death=10, new_cases=100)
+        self.slow = Covid19Schema(fast=False)
+        self.fast = Covid19Schema(fast=True, check_rate=0)
+
+    def test_same_output(self):
+        result = {'record_date': date(2020, 5, 27), 'country_name': 'World', 'new_death': 0, 'new_cases': 1}
+        self.assertDictEqual(self.fast.dump(self.record), self.slow.dump(self.record), msg='Unexpected object dump.')
+        self.assertDictEqual(self.fast.dump(result), Covid19Schema(fast=False).dump(result), msg='Unexpected dict dump.')
+        self.assertListEqual(
+            self.fast.dump([self.record, result], many=True),
+            self.slow.dump([self.record, result], many=True),
+            msg='Unexpected dump of many objects.'
+        )
+
+    def test_sampled_check(self):
+        with patch.object(Covid19Schema, 'load') as load:
+            self.fast.dump(self.record)
+            load.assert_not_called()
+            Covid19Schema(fast=True, check_rate=1).dump(self.record)
+            load.assert_called_once()
+
+    def test_not_compiled(self):
+        self.assertIsNotNone(self.fast.converters, msg='Plain schema was not compiled.')
+        schema = BatchResultSchema(fast=True, check_rate=0)
+        self.assertIsNone(schema.converters, msg='Schema with nested fields was compiled.')
+        self.assertDictEqual(schema.dump({'items': [{'country': 'UA'}]}), {'items': [{'country': 'UA'}]})
+
+    def test_empty_response(self):
+        with self.assertRaises(ValueError):
+            self.fast.dump({})
@@ -0,0 +1,149 @@
+import os
+import typing as t
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread, Timer
+from time import monotonic, sleep
+from unittest import TestCase
+from unittest.mock import patch
+from urllib.error import HTTPError
+
+from scrapping.scrapper import HttpFetcher, wait_for
+
+PAGE = b'<html><body><div><a download="" href="/files/data.csv">Download</a></div></body></html>'
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """ Stand-in of the data source which supports conditional requests. """
+    content: t.ClassVar[bytes] = b''
+    etag: t.ClassVar[str] = '"v1"'
+    requests: t.ClassVar[t.List[str]] = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.requests.append(self.path)
+        if self.path == '/':
+            self.reply(200, PAGE)
+        elif self.path == '/files/data.csv':
+            if self.headers.get('If-None-Match') == self.etag:
+                self.reply(304, b'')
+            else:
+                self.reply(200, self.content, {'ETag': self.etag})
+        else:
+            self.reply(404, b'')
+
+    def reply(self, status: int, body: bytes, headers: t.Dict[str, str] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+class HttpFetcherTests(TestCase):
+    server: t.ClassVar[HTTPServer]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = HTTPServer(('127.0.0.1', 0), SourceHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.download_file = Path(self.directory.name) / 'data.csv'
+        self.fetcher = HttpFetcher(source_url=f'http://127.0.0.1:{self.server.server_port}/', data_url=None)
+        SourceHandler.content = b'Date_reported,Country_code\n' * 10000
+        SourceHandler.etag = '"v1"'
+        SourceHandler.requests = []
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_download(self):
+        path = self.fetcher.fetch(self.download_file)
+        self.assertEqual(path, self.download_file, msg='Unexpected path of the downloaded file.')
+        self.assertEqual(path.read_bytes(), SourceHandler.content, msg='Unexpected content of the downloaded file.')
+        self.assertFalse(path.with_name('data.csv.part').exists(), msg='Partial file was not removed.')
+
+    def test_url_is_resolved_once(self):
+        self.fetcher.fetch(self.download_file)
+        SourceHandler.etag = '"v2"'
+        self.fetcher.fetch(self.download_file)
+        self.assertListEqual(
+            SourceHandler.requests, ['/', '/files/data.csv', '/files/data.csv'], msg='Unexpected requests.'
+        )
+
+    def test_not_modified(self):
+        self.fetcher.fetch(self.download_file)
+        self.assertIsNone(self.fetcher.fetch(self.download_file), msg='Not modified file was downloaded again.')
+
+        SourceHandler.etag = '"v2"'
+        SourceHandler.content = b'Date_reported,Country_code\n'
+        self.assertEqual(self.fetcher.fetch(self.download_file), self.download_file, msg='File was not downloaded.')
+        self.assertEqual(self.download_file.read_bytes(), SourceHandler.content, msg='File was not updated.')
+
+    def test_missing_file(self):
+        self.fetcher.data_url = f'http://127.0.0.1:{self.server.server_port}/missing.csv'
+        with self.assertRaises(HTTPError):
+            self.fetcher.fetch(self.download_file)
+        self.assertIsNone(self.fetcher.data_url, msg='Stale URL of the file was not reset.')
+
+
+def chrome_download(path: Path, chunks: int = 5) -> None:
+    """ Imitation of Chrome which writes the file by chunks and renames it when download is finished. """
+    partial = path.with_name(f'{path.name}.crdownload')
+    with open(partial, 'wb') as output:
+        for _ in range(chunks):
+            output.write(b'x' * 1024)
+            output.flush()
+            sleep(0.05)
+    os.replace(partial, path)
+
+
+@contextmanager
+def no_inotify(_directory):
+    yield None
+
+
+class WaitForTests(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.download_file = Path(self.directory.name) / 'data.csv'
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def assert_download_waited(self) -> None:
+        thread = Thread(target=chrome_download, args=(self.download_file,))
+        thread.start()
+        wait_for(self.download_file, max_wait=5)
+        self.assertEqual(self.download_file.stat().st_size, 5 * 1024, msg='Download was not finished.')
+        thread.join()
+
+    def test_inotify(self):
+        self.assert_download_waited()
+
+    def test_polling(self):
+        with patch('scrapping.scrapper.watch_directory', no_inotify):
+            self.assert_download_waited()
+
+    def test_returns_right_away(self):
+        Timer(0.1, self.download_file.write_bytes, args=(b'data',)).start()
+        started = monotonic()
+        wait_for(self.download_file, wait_period=1, max_wait=5)
+        self.assertLess(monotonic() - started, 1, msg='Finished download was not detected by event.')
+
+    def test_timeout(self):
+        with self.assertRaises(ValueError):
+            wait_for(self.download_file, max_wait=0.2)
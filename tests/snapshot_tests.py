@@ -0,0 +1,91 @@
+import os
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from root.db import connection
+from root.utils import DBTestCase
+from scrapping.aggregates import refresh_aggregates
+from scrapping.cache import RESPONSE_CACHE, bump_data_version
+from scrapping.models import Covid19
+from scrapping.snapshot import WORLD, Snapshot, SnapshotReader, publish_snapshot, write_snapshot
+from app import app
+
+
+class SnapshotTests(DBTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        with connection() as session:
+            session.add_all([
+                Covid19(record_date=date(2020, 5, 27), countries_iso_alpha_2='UA', country_name='Ukraine',
+                        new_death=10, new_cases=100),
+                Covid19(record_date=date(2020, 5, 29), countries_iso_alpha_2='UA', country_name='Ukraine',
+                        new_death=5, new_cases=50),
+                Covid19(record_date=date(2020, 5, 28), countries_iso_alpha_2='US', country_name='USA',
+                        new_death=20, new_cases=200),
+            ])
+            refresh_aggregates(session)
+            bump_data_version(session)
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'covid19.snapshot'
+        RESPONSE_CACHE.clear()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_lookups(self):
+        with connection() as session:
+            write_snapshot(session, self.path, 7)
+        snapshot = Snapshot(self.path)
+
+        self.assertEqual(snapshot.version, 7)
+        self.assertDictEqual(snapshot.by_date('UA', date(2020, 5, 29)), {
+            'record_date': date(2020, 5, 29), 'country_name': 'Ukraine', 'new_death': 5, 'new_cases': 50
+        })
+        self.assertIsNone(snapshot.by_date('UA', date(2020, 5, 28)), msg='Missing day was found.')
+        self.assertIsNone(snapshot.by_date('FR', date(2020, 5, 27)), msg='Missing country was found.')
+
+        self.assertDictEqual(snapshot.total_to_date('UA', date(2020, 5, 28)), {
+            'record_date': date(2020, 5, 27), 'country_name': 'Ukraine', 'new_death': 10, 'new_cases': 100
+        })
+        self.assertEqual(snapshot.total_to_date('UA', date(2020, 6, 1))['new_cases'], 150)
+        self.assertIsNone(snapshot.total_to_date('US', date(2020, 5, 27)), msg='Totals before first day were found.')
+
+        self.assertEqual(snapshot.by_date(WORLD, date(2020, 5, 28))['new_cases'], 200)
+        self.assertEqual(snapshot.total_to_date(WORLD, date(2020, 5, 29))['new_cases'], 350)
+
+    def test_publish(self):
+        self.assertTrue(publish_snapshot(self.path), msg='Snapshot was not published.')
+        self.assertFalse(publish_snapshot(self.path), msg='Snapshot of the same version was published again.')
+        self.assertEqual(os.listdir(self.directory.name), [self.path.name], msg='Temporary file was left.')
+
+    def test_reader(self):
+        reader = SnapshotReader(str(self.path), check_interval=0)
+        self.assertIsNone(reader.get(1), msg='Missing snapshot was returned.')
+
+        with connection() as session:
+            write_snapshot(session, self.path, 1)
+        self.assertEqual(reader.get(1).version, 1)
+        self.assertIsNone(reader.get(2), msg='Outdated snapshot was returned.')
+
+        with connection() as session:
+            write_snapshot(session, self.path, 2)
+        self.assertEqual(reader.get(2).version, 2, msg='Replaced snapshot was not reopened.')
+
+    def test_controllers(self):
+        publish_snapshot(self.path)
+        reader = SnapshotReader(str(self.path), check_interval=0)
+        with patch('scrapping.snapshot.SNAPSHOT', reader), patch('scrapping.controllers.read_session') as db_session:
+            self.assertEqual(self.client.get('/UA/2020-05-27').json['cases'], 100)
+            self.assertEqual(self.client.get('/UA/2020-05-28').status_code, 404)
+            self.assertEqual(self.client.get('/UA?date=2020-05-30').json['cases'], 150)
+            self.assertEqual(self.client.get('/world?date=2020-05-30').json['cases'], 350)
+            self.assertEqual(self.client.get('/world/2020-05-28').json['death'], 20)
+            response = self.client.post('/batch', json={'countries': ['UA', 'US'], 'date': '2020-05-28'})
+            self.assertEqual(response.json['items'][1]['cases'], 200)
+        db_session.query.assert_not_called()
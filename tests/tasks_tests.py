@@ -0,0 +1,279 @@
+import csv
+import typing as t
+from datetime import date
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+from unittest.mock import patch
+
+from root.celery import app as celery_app
+from root.utils import DBTestCase
+from root.db import connection, db
+from scrapping.bulk import RowsStream, UpsertReport, copy_rows, upsert_rows
+from scrapping.cache import get_data_version
+from scrapping.models import Covid19, Covid19Shard, DailyDigest, DataFile, WorldDaily
+from scrapping.parser import Covid19Row
+from scrapping.snapshot import Snapshot
+from scrapping.pipeline import IngestReport, Pipeline
+from scrapping.shards import split_span
+from scrapping.tasks import ingest_csv, store_csv_data
+
+HEADERS = [
+    'Date_reported', 'Country_code', 'Country', 'WHO_region',
+    'New_cases', 'Cumulative_cases', 'New_deaths', 'Cumulative_deaths'
+]
+
+
+def write_csv(path: Path, rows: t.List[t.List[t.Any]]) -> Path:
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+    return path
+
+
+class StoreCsvDataTests(DBTestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.csv_path = write_csv(Path(self.directory.name) / 'data.csv', [
+            ['2020-05-27T00:00:00Z', 'UA', 'Ukraine', 'EURO', 100, 100, 10, 10],
+            ['2020-05-28T00:00:00Z', 'UA', 'Ukraine', 'EURO', 50, 150, 5, 15],
+            ['2020-05-28T00:00:00Z', 'US', 'United States of America', 'AMRO', 200, 200, 20, 20],
+            ['2020-05-29', 'US', 'United States of America', 'AMRO', 'n/a', 200, 20, 40],
+        ])
+        with connection() as session:
+            session.query(Covid19).delete()
+            session.query(WorldDaily).delete()
+            session.query(DailyDigest).delete()
+            session.query(DataFile).delete()
+        self.download_dir = patch('scrapping.runs.DOWNLOAD_DIR', self.directory.name)
+        self.download_dir.start()
+
+    def tearDown(self) -> None:
+        self.download_dir.stop()
+        self.directory.cleanup()
+
+    def ingest(self) -> IngestReport:
+        with patch('scrapping.tasks.download_csv', return_value=self.csv_path):
+            return store_csv_data()
+
+    def get_ids(self) -> t.Dict[t.Tuple[date, str], int]:
+        with connection() as session:
+            return {
+                (record.record_date, record.countries_iso_alpha_2): record.id
+                for record in session.query(Covid19)
+            }
+
+    def test_full_load(self):
+        self.ingest()
+
+        with connection() as session:
+            records = [
+                (record.record_date, record.countries_iso_alpha_2, record.new_cases, record.total_cases)
+                for record in session.query(Covid19).order_by(Covid19.record_date, Covid19.countries_iso_alpha_2)
+            ]
+            rollups = [
+                (rollup.record_date, rollup.total_cases, rollup.total_death)
+                for rollup in session.query(WorldDaily).order_by(WorldDaily.record_date)
+            ]
+        self.assertListEqual(records, [
+            (date(2020, 5, 27), 'UA', 100, 100),
+            (date(2020, 5, 28), 'UA', 50, 150),
+            (date(2020, 5, 28), 'US', 200, 200),
+        ], msg='Unexpected stored records.')
+        self.assertListEqual(rollups, [
+            (date(2020, 5, 27), 100, 10),
+            (date(2020, 5, 28), 350, 35),
+        ], msg='Unexpected World rollup.')
+
+    def test_unchanged_file(self):
+        self.ingest()
+        ids = self.get_ids()
+        self.ingest()
+
+        self.assertDictEqual(self.get_ids(), ids, msg='Unchanged file was ingested again.')
+        with connection() as session:
+            self.assertEqual(session.query(DataFile).count(), 1, msg='Unchanged file was registered again.')
+
+    def test_changed_days_only(self):
+        self.ingest()
+        ids = self.get_ids()
+        write_csv(self.csv_path, [
+            ['2020-05-27T00:00:00Z', 'UA', 'Ukraine', 'EURO', 100, 100, 10, 10],
+            ['2020-05-28T00:00:00Z', 'UA', 'Ukraine', 'EURO', 60, 160, 5, 15],
+            ['2020-05-28T00:00:00Z', 'US', 'United States of America', 'AMRO', 200, 200, 20, 20],
+            ['2020-05-29T00:00:00Z', 'UA', 'Ukraine', 'EURO', 1, 161, 0, 15],
+        ])
+        self.ingest()
+
+        new_ids = self.get_ids()
+        self.assertEqual(
+            new_ids.pop((date(2020, 5, 27), 'UA')), ids[(date(2020, 5, 27), 'UA')], msg='Unchanged day was reloaded.'
+        )
+        self.assertSetEqual(set(new_ids), {
+            (date(2020, 5, 28), 'UA'), (date(2020, 5, 28), 'US'), (date(2020, 5, 29), 'UA')
+        }, msg='Unexpected changed records.')
+        with connection() as session:
+            record = session.query(Covid19).filter(
+                Covid19.countries_iso_alpha_2 == 'UA',
+                Covid19.record_date == date(2020, 5, 29)
+            ).one()
+            self.assertEqual(record.total_cases, 161, msg='Totals were not refreshed.')
+            self.assertEqual(session.query(DataFile).count(), 2, msg='Changed file was not registered.')
+
+    def test_report(self):
+        report = self.ingest()
+        self.assertEqual(report.status, 'ingested')
+        self.assertEqual(report.changed_days, 2)
+        self.assertEqual(report.upsert, UpsertReport(inserted=3, updated=0, unchanged=0, deleted=0))
+        stages = {stage.name: stage for stage in report.stages}
+        self.assertListEqual(
+            list(stages), ['download', 'fingerprint', 'parse', 'dedupe', 'merge', 'aggregates', 'commit'],
+            msg='Unexpected stages.'
+        )
+        self.assertEqual(stages['parse'].rows, 3, msg='Unexpected number of parsed rows.')
+        self.assertIsNone(stages['parse'].peak_memory, msg='Memory was traced.')
+
+        self.assertEqual(self.ingest().status, 'unchanged')
+        with patch('scrapping.tasks.download_csv', return_value=None):
+            self.assertEqual(store_csv_data().status, 'not_modified')
+
+    def test_trace_memory(self):
+        report = ingest_csv(self.csv_path, Pipeline(trace_memory=True))
+        self.assertTrue(all(stage.peak_memory is not None for stage in report.stages), msg='Memory was not traced.')
+
+    def test_publish_snapshot(self):
+        snapshot_path = Path(self.directory.name) / 'covid19.snapshot'
+        with patch('scrapping.tasks.SNAPSHOT_PATH', str(snapshot_path)):
+            self.ingest()
+
+        snapshot = Snapshot(snapshot_path)
+        self.assertEqual(snapshot.version, get_data_version().version, msg='Snapshot of wrong version was published.')
+        self.assertEqual(snapshot.total_to_date('UA', date(2020, 5, 28))['new_cases'], 150, msg='Unexpected totals.')
+
+
+class ShardedIngestTests(StoreCsvDataTests):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        celery_app.conf.task_always_eager = True
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        celery_app.conf.task_always_eager = False
+        super().tearDownClass()
+
+    def ingest(self) -> IngestReport:
+        with patch('scrapping.tasks.INGEST_SHARDS', 3):
+            return super().ingest()
+
+    def test_report(self):
+        with patch('scrapping.tasks.publish') as publish:
+            report = self.ingest()
+        self.assertEqual(report.status, 'dispatched')
+        self.assertListEqual(
+            [stage.name for stage in report.stages], ['download', 'fingerprint', 'split'], msg='Unexpected stages.'
+        )
+
+        stages = {stage.name: stage for stage in publish.call_args[0][0].stages}
+        self.assertListEqual(list(stages), [
+            *(f'{stage}:{index}' for index in range(3) for stage in ('parse', 'dedupe', 'stage')),
+            'merge', 'aggregates', 'commit'
+        ], msg='Unexpected stages of the shards.')
+        self.assertEqual(
+            sum(stages[f'parse:{index}'].rows for index in range(3)), 3, msg='Unexpected number of parsed rows.'
+        )
+        with connection() as session:
+            self.assertEqual(session.query(Covid19Shard).count(), 0, msg='Staged rows were not removed.')
+
+        self.assertEqual(self.ingest().status, 'unchanged')
+
+    def test_split_span(self):
+        self.assertListEqual(split_span((date(2020, 5, 1), date(2020, 5, 10)), 3), [
+            (date.min, date(2020, 5, 3)), (date(2020, 5, 4), date(2020, 5, 6)), (date(2020, 5, 7), date.max)
+        ], msg='Unexpected ranges.')
+        self.assertListEqual(split_span((date(2020, 5, 1), date(2020, 5, 1)), 3), [(date.min, date.max)])
+        self.assertListEqual(split_span(None, 3), [(date.min, date.max)])
+
+    def test_removed_days(self):
+        self.ingest()
+        write_csv(self.csv_path, [
+            ['2020-05-28T00:00:00Z', 'UA', 'Ukraine', 'EURO', 50, 50, 5, 5],
+        ])
+        self.ingest()
+
+        with connection() as session:
+            records = [(record.record_date, record.total_cases) for record in session.query(Covid19)]
+            digests = [digest.record_date for digest in session.query(DailyDigest)]
+        self.assertListEqual(records, [(date(2020, 5, 28), 50)], msg='Removed days were not deleted.')
+        self.assertListEqual(digests, [date(2020, 5, 28)], msg='Digests of the removed days were not deleted.')
+
+
+class RowsStreamTests(DBTestCase):
+
+    def test_read_by_chunks(self):
+        rows = [(date(2020, 5, 27), 'BQ', 'Bonaire, Sint Eustatius and Saba', 0, 1)] * 3
+        stream = RowsStream(rows)
+        chunks = []
+        while True:
+            chunk = stream.read(16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(
+            ''.join(chunks),
+            '2020-05-27,BQ,"Bonaire, Sint Eustatius and Saba",0,1\n' * 3,
+            msg='Unexpected CSV stream.'
+        )
+        self.assertEqual(stream.count, 3, msg='Unexpected number of streamed rows.')
+
+
+class UpsertRowsTests(DBTestCase):
+
+    def setUp(self) -> None:
+        with connection() as session:
+            session.query(Covid19).delete()
+            session.add_all([
+                Covid19(
+                    record_date=date(2020, 5, day),
+                    countries_iso_alpha_2=country,
+                    country_name=country,
+                    new_death=1,
+                    new_cases=10
+                )
+                for day in (27, 28)
+                for country in ('UA', 'US', 'PL')
+            ])
+
+    def test_upsert(self):
+        with connection() as session:
+            report = upsert_rows(session, [
+                Covid19Row(date(2020, 5, 28), 'UA', 'UA', 1, 10),
+                Covid19Row(date(2020, 5, 28), 'US', 'US', 2, 20),
+                Covid19Row(date(2020, 5, 29), 'UA', 'UA', 3, 30),
+            ], [(date(2020, 5, 28), date(2020, 5, 29))])
+
+        self.assertEqual(report, UpsertReport(inserted=1, updated=1, unchanged=1, deleted=1), msg='Unexpected counts.')
+        with connection() as session:
+            records = [
+                (record.record_date.day, record.countries_iso_alpha_2, record.new_cases)
+                for record in session.query(Covid19).order_by(Covid19.record_date, Covid19.countries_iso_alpha_2)
+            ]
+        self.assertListEqual(records, [
+            (27, 'PL', 10), (27, 'UA', 10), (27, 'US', 10),
+            (28, 'UA', 10), (28, 'US', 20),
+            (29, 'UA', 30),
+        ], msg='Unexpected merged records.')
+
+    @skipUnless(db.engine.dialect.name == 'postgresql', 'COPY is supported by PostgreSQL only.')
+    def test_copy_rows(self):
+        with connection() as session:
+            count = copy_rows(session, [
+                (date(2020, 5, 27), 'UA', 'Ukraine', 10, 100),
+                (date(2020, 5, 28), 'UA', 'Ukraine', 5, 50),
+            ])
+            staged = session.execute('SELECT count(*) FROM covid19_staging').scalar()
+        self.assertEqual(count, 2, msg='Unexpected number of copied rows.')
+        self.assertEqual(staged, 2, msg='Unexpected number of staged rows.')